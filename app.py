@@ -1,7 +1,169 @@
 import streamlit as st
-import sys
+from concurrent.futures import wait
 from io import StringIO
-from logic import parse, ParseError, TableauProver
+from logic import parse, ParseError, ProofCancelled, TableauProver, ALL_RULES, valid_conclusions
+from jobs import JobPool, PoolBusy, drive
+
+
+MAX_ITERATIONS = 50
+MAX_BUDGET = 20000
+CACHE_ENTRIES = 512
+WORKERS = 4
+MAX_PENDING = 16
+POLL_SECONDS = 0.5
+QUICK_SECONDS = 0.1
+
+
+# ============================================================================
+# CACHE DE PRUEBAS
+# ============================================================================
+
+@st.cache_resource
+def get_prover_config():
+    """Configuracion del probador compartida por todas las sesiones"""
+    return {"rules": tuple(ALL_RULES)}
+
+
+@st.cache_resource
+def get_job_pool():
+    """Pool de trabajadores compartido para las pruebas en segundo plano"""
+    return JobPool(max_workers=WORKERS, max_pending=MAX_PENDING)
+
+
+def normalize(text):
+    """Normalizar la entrada igual que el parser (sin espacios)"""
+    return text.replace(' ', '')
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def run_formula(formula_text, verbose, max_iterations=MAX_ITERATIONS, _job=None):
+    """Probar una formula; memoiza (texto, modo) -> (parseada, resultado, traza)"""
+    parsed = parse(formula_text)
+    trace = StringIO()
+    prover = TableauProver(max_iterations=max_iterations, **get_prover_config())
+    result = drive(prover.prove_steps(parsed, verbose=verbose, out=trace), _job)
+    return str(parsed), result, trace.getvalue()
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def run_argument(premises_text, conclusion_text, verbose, max_iterations=MAX_ITERATIONS, _job=None):
+    """Probar un argumento; memoiza (textos, modo) -> (parseados, resultado, traza)"""
+    parsed_premises = [parse(p) for p in premises_text]
+    parsed_conclusion = parse(conclusion_text)
+    trace = StringIO()
+    prover = TableauProver(max_iterations=max_iterations, **get_prover_config())
+    steps = prover.prove_argument_steps(parsed_premises, parsed_conclusion, verbose=verbose, out=trace)
+    result = drive(steps, _job)
+    return [str(p) for p in parsed_premises], str(parsed_conclusion), result, trace.getvalue()
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def run_conclusions(premises_text, max_iterations=MAX_ITERATIONS):
+    """Conclusiones categoriales validas (y sin decidir) sobre los terminos de las premisas"""
+    prover = TableauProver(max_iterations=max_iterations, **get_prover_config())
+    valid, undecided = valid_conclusions([parse(p) for p in premises_text], prover=prover)
+    return [str(c) for c in valid], [str(c) for c in undecided]
+
+
+# ============================================================================
+# EJEMPLOS
+# ============================================================================
+
+examples = {
+    "Barbara": {
+        "premises": ["[M]P", "[S]M"],
+        "conclusion": "[S]P",
+        "description": "Todo M es P, Todo S es M ⊢ Todo S es P (no valido aqui)"
+    },
+    "Celarent": {
+        "premises": ["-<M>P", "[S]M"],
+        "conclusion": "-<S>P",
+        "description": "Ningun M es P, Todo S es M ⊢ Ningun S es P (no valido aqui)"
+    },
+    "Darii": {
+        "premises": ["[M]P", "<S>M"],
+        "conclusion": "<S>P",
+        "description": "Todo M es P, Algun S es M ⊢ Algun S es P (no valido aqui)"
+    },
+    "Ferio": {
+        "premises": ["-<M>P", "<S>M"],
+        "conclusion": "<S>~P",
+        "description": "Ningun M es P, Algun S es M ⊢ Algun S es no-P (no valido aqui)"
+    },
+}
+
+logic_examples = {
+    "Ley del Tercero Excluido": "A | -A",
+    "Ley de No Contradiccion": "-(A & -A)",
+    "Modus Ponens": "(A & (A -> B)) -> B",
+    "Modus Tollens": "((A -> B) & -B) -> -A",
+    "Silogismo Hipotetico": "((A -> B) & (B -> C)) -> (A -> C)",
+    "Dilema Constructivo": "((A -> B) & (C -> D) & (A | C)) -> (B | D)",
+}
+
+
+@st.cache_resource(show_spinner="Precalculando ejemplos...")
+def precompute_examples():
+    """Probar todos los ejemplos una sola vez por proceso del servidor"""
+    results = {}
+    for name, example in examples.items():
+        premises = tuple(normalize(p) for p in example['premises'])
+        results[name] = run_argument(premises, normalize(example['conclusion']), False)[2]
+    for name, formula in logic_examples.items():
+        results[name] = run_formula(normalize(formula), False)[1]
+    return results
+
+
+example_results = precompute_examples()
+
+
+# ============================================================================
+# PRUEBAS EN SEGUNDO PLANO
+# ============================================================================
+
+def start_job(key, fn, *args, budget):
+    """Lanzar una prueba en el pool y guardar el job en la sesion"""
+    try:
+        job = get_job_pool().submit(fn, *args, budget, budget=budget)
+    except PoolBusy as e:
+        st.warning(f"⏳ {str(e)}")
+        return
+    st.session_state[key] = job
+    # Las pruebas cortas (o ya memoizadas) se muestran sin esperar al sondeo
+    wait([job.future], timeout=QUICK_SECONDS)
+
+
+def finished_job(key):
+    """Retornar el job terminado de la sesion (y olvidarlo), o None"""
+    job = st.session_state.get(key)
+    if job is not None and job.done():
+        del st.session_state[key]
+        return job
+    return None
+
+
+@st.fragment(run_every=POLL_SECONDS)
+def job_progress(key):
+    """Mostrar el progreso de un job en curso con opcion de cancelar"""
+    job = st.session_state.get(key)
+    if job is None or job.done():
+        st.rerun()
+    
+    st.progress(
+        min(job.iteration / job.budget, 1.0),
+        text=f"Iteracion {job.iteration} de {job.budget} · Ramas abiertas: {job.open_branches}"
+    )
+    if job.cancelled:
+        st.caption("Cancelando...")
+    elif st.button("⏹ Cancelar", key=f"cancel_{key}"):
+        job.cancel()
+
+
+max_iterations = st.sidebar.number_input(
+    "Iteraciones maximas:",
+    min_value=10, max_value=MAX_BUDGET, value=MAX_ITERATIONS, step=10,
+    help="Presupuesto de la busqueda; las pruebas largas se pueden cancelar"
+)
 
 st.divider()
 
@@ -40,21 +202,19 @@ with tab1:
     show_steps = st.checkbox("Mostrar paso a paso", value=False)
     
     if prove_button and formula_input:
+        start_job("formula_job", run_formula, normalize(formula_input), show_steps,
+                  budget=max_iterations)
+    
+    job = finished_job("formula_job")
+    if "formula_job" in st.session_state:
+        job_progress("formula_job")
+    elif job is not None:
         try:
-            parsed = parse(formula_input)
+            parsed, result, output = job.result()
             
             st.markdown("### Formula Parseada")
             st.markdown(f'<div class="formula-box">{parsed}</div>', unsafe_allow_html=True)
             
-            old_stdout = sys.stdout
-            sys.stdout = captured_output = StringIO()
-            
-            prover = TableauProver(max_iterations=50)
-            result = prover.prove(parsed, verbose=show_steps)
-            
-            sys.stdout = old_stdout
-            output = captured_output.getvalue()
-            
             st.markdown("### Resultado")
             
             if result:
@@ -73,6 +233,8 @@ with tab1:
                 with st.expander("Ver pasos detallados", expanded=True):
                     st.text(output)
         
+        except ProofCancelled as e:
+            st.warning(f"⏹ Prueba cancelada: {str(e)}")
         except ParseError as e:
             st.error(f"❌ Error al parsear la formula: {str(e)}")
             st.info("💡 Revisa la sintaxis en la guia de la barra lateral.")
@@ -105,27 +267,25 @@ with tab2:
     show_steps_arg = st.checkbox("Mostrar paso a paso", value=False, key="show_steps_arg")
     
     if prove_arg_button:
+        premises_text = tuple(normalize(p) for p in premises_input if p.strip())
+        start_job("argument_job", run_argument, premises_text, normalize(conclusion_input),
+                  show_steps_arg, budget=max_iterations)
+    
+    job = finished_job("argument_job")
+    if "argument_job" in st.session_state:
+        job_progress("argument_job")
+    elif job is not None:
         try:
-            parsed_premises = [parse(p) for p in premises_input if p.strip()]
-            parsed_conclusion = parse(conclusion_input)
+            parsed_premises, parsed_conclusion, result, output = job.result()
             
             st.markdown("### Argumento")
             
             st.markdown("**Premisas:**")
-            for i, (p_str, p_parsed) in enumerate(zip(premises_input, parsed_premises), 1):
+            for i, p_parsed in enumerate(parsed_premises, 1):
                 st.markdown(f'{i}. <div class="formula-box">{p_parsed}</div>', unsafe_allow_html=True)
             
             st.markdown(f'**Conclusion:** <div class="formula-box">{parsed_conclusion}</div>', unsafe_allow_html=True)
             
-            old_stdout = sys.stdout
-            sys.stdout = captured_output = StringIO()
-            
-            prover = TableauProver(max_iterations=50)
-            result = prover.prove_argument(parsed_premises, parsed_conclusion, verbose=show_steps_arg)
-            
-            sys.stdout = old_stdout
-            output = captured_output.getvalue()
-            
             st.markdown("### Resultado")
             
             if result:
@@ -144,6 +304,8 @@ with tab2:
                 with st.expander("Ver pasos detallados", expanded=True):
                     st.text(output)
         
+        except ProofCancelled as e:
+            st.warning(f"⏹ Prueba cancelada: {str(e)}")
         except ParseError as e:
             st.error(f"❌ Error al parsear: {str(e)}")
             st.info("💡 Revisa la sintaxis en la guia.")
@@ -155,29 +317,10 @@ with tab3:
     st.header("Ejemplos de Silogismos y Formulas")
     
     st.markdown("### Silogismos Clasicos")
-    
-    examples = {
-        "Barbara": {
-            "premises": ["[M]P", "[S]M"],
-            "conclusion": "[S]P",
-            "description": "Todo M es P, Todo S es M ⊢ Todo S es P"
-        },
-        "Celarent": {
-            "premises": ["-<M>P", "[S]M"],
-            "conclusion": "-<S>P",
-            "description": "Ningun M es P, Todo S es M ⊢ Ningun S es P"
-        },
-        "Darii": {
-            "premises": ["[M]P", "<S>M"],
-            "conclusion": "<S>P",
-            "description": "Todo M es P, Algun S es M ⊢ Algun S es P"
-        },
-        "Ferio": {
-            "premises": ["-<M>P", "<S>M"],
-            "conclusion": "<S>~P",
-            "description": "Ningun M es P, Algun S es M ⊢ Algun S es no-P"
-        },
-    }
+    st.caption("Validos en la silogistica clasica, pero no en este sistema: [A]B dice "
+               "que en cada Qxyz, si A vale en y, B vale en z. El termino medio queda en "
+               "z en una premisa y en y en la otra, y la restriccion existencial solo "
+               "agrega lo que Q obliga, asi que el tableau queda abierto.")
     
     for name, example in examples.items():
         with st.expander(f"**{name}** - {example['description']}"):
@@ -189,51 +332,32 @@ with tab3:
             st.code(example['conclusion'], language=None)
             
             if st.button(f"Probar {name}", key=f"example_{name}"):
-                try:
-                    parsed_premises = [parse(p) for p in example['premises']]
-                    parsed_conclusion = parse(example['conclusion'])
-                    
-                    with st.spinner(f"Probando {name}..."):
-                        prover = TableauProver(max_iterations=50)
-                        result = prover.prove_argument(parsed_premises, parsed_conclusion, verbose=False)
-                    
-                    if result:
-                        st.success(f"✓ {name} es VALIDO")
-                    else:
-                        st.warning(f"✗ {name} NO es valido en este sistema")
-                except Exception as e:
-                    st.error(f"Error: {str(e)}")
+                if example_results[name]:
+                    st.success(f"✓ {name} es VALIDO")
+                else:
+                    st.warning(f"✗ {name} NO es valido en este sistema")
+            
+            if st.button("¿Que se sigue de estas premisas?", key=f"conclusions_{name}"):
+                premises = tuple(normalize(p) for p in example['premises'])
+                valid, undecided = run_conclusions(premises)
+                st.markdown("**Conclusiones validas:**")
+                st.code("\n".join(valid) or "(ninguna)", language=None)
+                if undecided:
+                    st.warning(f"⏱ {len(undecided)} conclusion(es) sin decidir: se agoto el "
+                               f"presupuesto de {MAX_ITERATIONS} iteraciones")
     
     st.divider()
     
     st.markdown("### Formulas Logicas Clasicas")
     
-    logic_examples = {
-        "Ley del Tercero Excluido": "A | -A",
-        "Ley de No Contradiccion": "-(A & -A)",
-        "Modus Ponens": "(A & (A -> B)) -> B",
-        "Modus Tollens": "((A -> B) & -B) -> -A",
-        "Silogismo Hipotetico": "((A -> B) & (B -> C)) -> (A -> C)",
-        "Dilema Constructivo": "((A -> B) & (C -> D) & (A | C)) -> (B | D)",
-    }
-    
     for name, formula in logic_examples.items():
         with st.expander(f"**{name}**"):
             st.code(formula, language=None)
             if st.button(f"Probar {name}", key=f"logic_{name}"):
-                try:
-                    parsed = parse(formula)
-                    
-                    with st.spinner(f"Probando {name}..."):
-                        prover = TableauProver(max_iterations=50)
-                        result = prover.prove(parsed, verbose=False)
-                    
-                    if result:
-                        st.success(f"✓ {name} es VALIDO")
-                    else:
-                        st.warning(f"✗ {name} NO es valido")
-                except Exception as e:
-                    st.error(f"Error: {str(e)}")
+                if example_results[name]:
+                    st.success(f"✓ {name} es VALIDO")
+                else:
+                    st.warning(f"✗ {name} NO es valido")
 
 st.divider()
 
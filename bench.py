@@ -0,0 +1,297 @@
+"""
+Lógica Subatómica - Banco de pruebas de rendimiento
+
+Corpus:
+    silogismos   los 256 silogismos categoriales (64 modos x 4 figuras)
+    clasicas     las formulas de logica clasica del app
+    terminos     los silogismos con el predicado mayor complementado o privado
+
+Por item mide el tiempo (el mejor de --repeat corridas), las reglas aplicadas,
+el pico de ramas abiertas y el pico de memoria (en una corrida aparte, porque
+tracemalloc distorsiona el tiempo). Con un archivo de referencia reporta las
+regresiones y termina con codigo 1. Siempre prueba ademas los argumentos
+invalidos de MUST_FAIL y compara los silogismos validos con la tabla clasica
+(VALID_MOODS): si algun invalido resulta valido el probador no es correcto,
+tambien termina con codigo 1 y no guarda la referencia.
+
+Uso:
+    python bench.py
+    python bench.py --corpus silogismos --repeat 5 -o resultados.jsonl
+    python bench.py --save-baseline bench_baseline.json
+    python bench.py --baseline bench_baseline.json
+"""
+
+import argparse
+import itertools
+import json
+import sys
+import time
+import tracemalloc
+
+from logic import parse, TableauProver
+
+
+DEFAULT_ITERATIONS = 200
+
+# Tolerancias para las regresiones. Los items de menos de un milisegundo son
+# puro ruido uno por uno: el tiempo se compara por corpus y, por item, solo
+# si la diferencia supera TIME_FLOOR_MS.
+TIME_TOLERANCE = 0.5
+TIME_FLOOR_MS = 5.0
+CORPUS_TIME_TOLERANCE = 0.5
+MEMORY_TOLERANCE = 0.25
+
+
+# ============================================================================
+# CORPUS
+# ============================================================================
+
+FORMS = {
+    'a': "[{s}]{p}",        # Todo S es P
+    'e': "-<{s}>{p}",       # Ningun S es P
+    'i': "<{s}>{p}",        # Algun S es P
+    'o': "-[{s}]{p}",       # Algun S no es P
+}
+
+# Premisa mayor y menor de cada figura (la conclusion es siempre S-P)
+FIGURES = {
+    1: (("M", "P"), ("S", "M")),
+    2: (("P", "M"), ("S", "M")),
+    3: (("M", "P"), ("M", "S")),
+    4: (("P", "M"), ("M", "S")),
+}
+
+# Las mismas formulas de la pestaña de ejemplos del app
+CLASSICAL = {
+    "tercero-excluido": "A | -A",
+    "no-contradiccion": "-(A & -A)",
+    "modus-ponens": "(A & (A -> B)) -> B",
+    "modus-tollens": "((A -> B) & -B) -> -A",
+    "silogismo-hipotetico": "((A -> B) & (B -> C)) -> (A -> C)",
+    "dilema-constructivo": "((A -> B) & (C -> D) & (A | C)) -> (B | D)",
+}
+
+# Argumentos invalidos que el probador nunca debe dar por validos
+MUST_FAIL = {
+    "a-desde-i": (["<A>B"], "[A]B"),
+    "conversion-a": (["[A]B"], "[B]A"),
+    "conversion-i": (["<A>B"], "<B>A"),
+    "aea-1": (["[M]P", "-<S>M"], "[S]P"),
+}
+
+# Los 15 modos validos sin importe existencial (modo-figura). Un modelo
+# booleano es un modelo de Q (Qxdd por cada individuo d), asi que un
+# silogismo valido para el probador tiene que estar aqui
+VALID_MOODS = frozenset([
+    "aaa-1", "eae-1", "aii-1", "eio-1",     # Barbara, Celarent, Darii, Ferio
+    "eae-2", "aee-2", "eio-2", "aoo-2",     # Cesare, Camestres, Festino, Baroco
+    "iai-3", "aii-3", "oao-3", "eio-3",     # Disamis, Datisi, Bocardo, Ferison
+    "aee-4", "iai-4", "eio-4",              # Camenes, Dimaris, Fresison
+])
+
+
+def syllogisms(predicate="P", prefix=""):
+    """Los 256 silogismos como items {id, premises, conclusion} en texto"""
+    for figure, (major, minor) in FIGURES.items():
+        for mood in itertools.product(FORMS, repeat=3):
+            terms = {"S": "S", "M": "M", "P": predicate}
+            major_text = FORMS[mood[0]].format(s=terms[major[0]], p=terms[major[1]])
+            minor_text = FORMS[mood[1]].format(s=terms[minor[0]], p=terms[minor[1]])
+            yield {
+                "id": f"{prefix}{''.join(mood)}-{figure}",
+                "premises": [major_text, minor_text],
+                "conclusion": FORMS[mood[2]].format(s="S", p=predicate),
+            }
+
+
+def classical():
+    for name, formula in CLASSICAL.items():
+        yield {"id": name, "formula": formula}
+
+
+def term_variants():
+    yield from syllogisms("~P", prefix="comp-")
+    yield from syllogisms("^P", prefix="priv-")
+
+
+CORPORA = {
+    "silogismos": syllogisms,
+    "clasicas": classical,
+    "terminos": term_variants,
+}
+
+
+# ============================================================================
+# MEDICION
+# ============================================================================
+
+def prepare(item):
+    """Parsear el item una sola vez, fuera de la medicion"""
+    if "formula" in item:
+        return None, parse(item["formula"])
+    return [parse(p) for p in item["premises"]], parse(item["conclusion"])
+
+
+def run_once(premises, conclusion, max_iterations):
+    """Una corrida: (valido, reglas aplicadas, pico de ramas abiertas)"""
+    prover = TableauProver(max_iterations=max_iterations)
+    if premises is None:
+        steps = prover.prove_steps(conclusion)
+    else:
+        steps = prover.prove_argument_steps(premises, conclusion)
+    peak_branches = 1
+    while True:
+        try:
+            _, open_branches = next(steps)
+        except StopIteration as stop:
+            return stop.value, len(prover.applied_rules), peak_branches
+        peak_branches = max(peak_branches, open_branches)
+
+
+def measure(item, corpus, max_iterations=DEFAULT_ITERATIONS, repeat=3):
+    """Registro de rendimiento de un item"""
+    premises, conclusion = prepare(item)
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        valid, rules, peak_branches = run_once(premises, conclusion, max_iterations)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        run_once(premises, conclusion, max_iterations)
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "id": item["id"],
+        "corpus": corpus,
+        "valid": valid,
+        "ms": round(best * 1000.0, 3),
+        "rules": rules,
+        "peak_branches": peak_branches,
+        "peak_kb": round(peak_bytes / 1024.0, 1),
+    }
+
+
+def run(corpora, max_iterations=DEFAULT_ITERATIONS, repeat=3):
+    """Generar los registros de todos los items de los corpus pedidos"""
+    for corpus in corpora:
+        for item in CORPORA[corpus]():
+            yield measure(item, corpus, max_iterations, repeat)
+
+
+def unsound(max_iterations=DEFAULT_ITERATIONS):
+    """Los nombres de MUST_FAIL que el probador da por validos"""
+    found = []
+    for name, (premises, conclusion) in MUST_FAIL.items():
+        prover = TableauProver(max_iterations=max_iterations)
+        if prover.prove_argument([parse(p) for p in premises], parse(conclusion)):
+            found.append(name)
+    return found
+
+
+def outside_table(records):
+    """Silogismos dados por validos que no estan en VALID_MOODS"""
+    return [r["id"] for r in records
+            if r["corpus"] == "silogismos" and r["valid"] and r["id"] not in VALID_MOODS]
+
+
+# ============================================================================
+# REPORTES
+# ============================================================================
+
+def report(records, stream):
+    """Tabla resumen por corpus"""
+    print(f"{'corpus':<12}{'items':>7}{'validos':>9}{'total ms':>11}{'media ms':>10}"
+          f"{'max ms':>9}{'reglas':>9}{'ramas':>7}{'max KB':>9}  mas lento", file=stream)
+    groups = {}
+    for record in records:
+        groups.setdefault(record["corpus"], []).append(record)
+    for corpus, group in groups.items():
+        total = sum(r["ms"] for r in group)
+        slowest = max(group, key=lambda r: r["ms"])
+        print(f"{corpus:<12}{len(group):>7}{sum(1 for r in group if r['valid']):>9}"
+              f"{total:>11.1f}{total / len(group):>10.2f}{slowest['ms']:>9.2f}"
+              f"{sum(r['rules'] for r in group):>9}"
+              f"{max(r['peak_branches'] for r in group):>7}"
+              f"{max(r['peak_kb'] for r in group):>9.1f}  {slowest['id']}", file=stream)
+
+
+def regressions(records, baseline):
+    """
+    Comparar con la referencia. Las reglas aplicadas y la validez son
+    deterministas y se comparan exactas; tiempo y memoria con tolerancia.
+    """
+    found = []
+    totals = {}
+    for record in records:
+        base = baseline.get(f"{record['corpus']}/{record['id']}")
+        if base is None:
+            continue
+        name = f"{record['corpus']}/{record['id']}"
+        total = totals.setdefault(record["corpus"], [0.0, 0.0])
+        total[0] += base["ms"]
+        total[1] += record["ms"]
+        if record["valid"] != base["valid"]:
+            found.append(f"{name}: valido {base['valid']} -> {record['valid']}")
+        if record["rules"] > base["rules"]:
+            found.append(f"{name}: reglas {base['rules']} -> {record['rules']}")
+        if (record["ms"] > base["ms"] * (1 + TIME_TOLERANCE) and
+                record["ms"] - base["ms"] > TIME_FLOOR_MS):
+            found.append(f"{name}: tiempo {base['ms']:.2f} -> {record['ms']:.2f} ms")
+        if record["peak_kb"] > base["peak_kb"] * (1 + MEMORY_TOLERANCE):
+            found.append(f"{name}: memoria {base['peak_kb']:.1f} -> {record['peak_kb']:.1f} KB")
+
+    for corpus, (before, after) in totals.items():
+        if after > before * (1 + CORPUS_TIME_TOLERANCE) and after - before > TIME_FLOOR_MS:
+            found.append(f"{corpus} (total): tiempo {before:.1f} -> {after:.1f} ms")
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Banco de pruebas de rendimiento del probador")
+    parser.add_argument("--corpus", action="append", choices=list(CORPORA),
+                        help="Corpus a medir (repetible; por defecto todos)")
+    parser.add_argument("--repeat", type=int, default=3, help="Corridas por item (se toma la mejor)")
+    parser.add_argument("--max-iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("-o", "--output", help="Escribir los registros por item (JSONL)")
+    parser.add_argument("--baseline", help="Archivo de referencia para detectar regresiones")
+    parser.add_argument("--save-baseline", help="Guardar los resultados como referencia")
+    args = parser.parse_args(argv)
+
+    records = list(run(args.corpus or list(CORPORA), args.max_iterations, args.repeat))
+    report(records, sys.stdout)
+
+    wrong = unsound(args.max_iterations) + outside_table(records)
+    if wrong:
+        print(f"\nInvalidos dados por validos: {', '.join(wrong)}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as sink:
+            for record in records:
+                sink.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    if args.save_baseline and wrong:
+        print("\nNo se guarda la referencia: el probador da por validos argumentos invalidos")
+    elif args.save_baseline:
+        baseline = {f"{r['corpus']}/{r['id']}": {k: r[k] for k in ("valid", "ms", "rules", "peak_kb")}
+                    for r in records}
+        with open(args.save_baseline, "w", encoding="utf-8") as sink:
+            json.dump(baseline, sink, indent=1, sort_keys=True)
+        print(f"\nReferencia guardada en {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as source:
+            found = regressions(records, json.load(source))
+        print(f"\nRegresiones: {len(found)}")
+        for line in found:
+            print(f"  {line}")
+        return 1 if found or wrong else 0
+    return 1 if wrong else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Lógica Subatómica - Benchmark de la serialización binaria contra pickle
+
+Compara encode_formulas/decode_formulas con pickle (protocolo más alto) en
+tiempo de codificación y decodificación y en tamaño, de dos maneras:
+    item    cada fórmula por separado (mensajes a un pool, claves de cache)
+    lote    todo el corpus de una vez
+
+Corpus:
+    silogismos  premisas y conclusiones de los 256 silogismos (bench.py)
+    generado    fórmulas aleatorias de generate.py (--count, --depth, --terms)
+
+Uso:
+    python bench_codec.py
+    python bench_codec.py --count 50000 --depth 5 --repeat 5
+"""
+
+import argparse
+import pickle
+import sys
+import time
+
+from bench import syllogisms
+from generate import FormulaGenerator
+from logic import parse, encode_formulas, decode_formulas
+
+
+def syllogism_corpus():
+    formulas = []
+    for item in syllogisms():
+        formulas += [parse(p) for p in item["premises"]] + [parse(item["conclusion"])]
+    return formulas
+
+
+def generated_corpus(count, depth, terms, seed):
+    generator = FormulaGenerator(seed, depth, terms, quantifiers=0.6, operators=0.3)
+    return [parse(generator.formula()) for _ in range(count)]
+
+
+def best_of(repeat, function):
+    """Mejor tiempo (segundos) de 'repeat' corridas y el último resultado"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def measure(formulas, repeat):
+    """Filas (formato, modo, encode ms, decode ms, bytes)"""
+    protocol = pickle.HIGHEST_PROTOCOL
+    codecs = {
+        "pickle": (lambda fs: pickle.dumps(fs, protocol), pickle.loads),
+        "binario": (encode_formulas, decode_formulas),
+    }
+    rows = []
+    for name, (encode, decode) in codecs.items():
+        encode_time, blob = best_of(repeat, lambda: encode(formulas))
+        decode_time, decoded = best_of(repeat, lambda: decode(blob))
+        if list(decoded) != formulas:
+            raise AssertionError(f"{name}: batch round trip changed the formulas")
+        rows.append((name, "lote", encode_time, decode_time, len(blob)))
+
+        encode_time, blobs = best_of(repeat, lambda: [encode([f]) for f in formulas])
+        decode_time, _ = best_of(repeat, lambda: [decode(b) for b in blobs])
+        rows.append((name, "item", encode_time, decode_time, sum(len(b) for b in blobs)))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serializacion binaria de formulas contra pickle")
+    parser.add_argument("--count", type=int, default=20000, help="Formulas del corpus generado")
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--terms", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Corridas por medicion (se toma la mejor)")
+    args = parser.parse_args(argv)
+
+    corpora = {
+        "silogismos": syllogism_corpus(),
+        "generado": generated_corpus(args.count, args.depth, args.terms, args.seed),
+    }
+    print(f"{'corpus':<12}{'formato':<9}{'modo':<6}{'formulas':>9}{'encode ms':>11}"
+          f"{'decode ms':>11}{'bytes':>11}{'B/formula':>11}")
+    for corpus, formulas in corpora.items():
+        for name, mode, encode_time, decode_time, size in measure(formulas, args.repeat):
+            print(f"{corpus:<12}{name:<9}{mode:<6}{len(formulas):>9}{encode_time * 1000.0:>11.1f}"
+                  f"{decode_time * 1000.0:>11.1f}{size:>11}{size / len(formulas):>11.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
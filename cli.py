@@ -0,0 +1,252 @@
+"""
+Lógica Subatómica - Procesamiento por lotes desde la línea de comandos
+
+Lee fórmulas o argumentos (uno por línea) de un archivo o de stdin y escribe
+un resultado JSON por línea a medida que se obtienen, en memoria constante.
+Cada registro lleva "valid" y "exhausted": un item que agota su presupuesto
+queda sin decidir ("valid": false, "exhausted": true) y se cuenta aparte.
+
+Formatos de entrada (detectados por línea):
+    JSONL:  {"id": "b1", "formula": "A | -A", "max_iterations": 100}
+            {"id": "b2", "premises": ["[A]B", "[B]C"], "conclusion": "[A]C"}
+    Texto:  A | -A
+            [A]B; [B]C => [A]C
+
+Uso:
+    python cli.py corpus.jsonl -o resultados.jsonl --jobs 4 --max-iterations 200
+    python cli.py corpus.jsonl --stats    (agrega "stats" a cada registro)
+    python cli.py corpus.jsonl --profile --spans spans.jsonl
+    python cli.py corpus.jsonl --snapshots pendientes/   (ver snapshot.py)
+    cat formulas.txt | python cli.py -
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from logic import parse, ParseError, TableauProver, AggregateProfile, SpanExporter
+import snapshot
+
+
+DEFAULT_ITERATIONS = 200
+
+
+# ============================================================================
+# LECTURA DE ITEMS
+# ============================================================================
+
+def parse_line(line, number):
+    """Convertir una línea de entrada en un item (dict), o None si está vacía"""
+    text = line.strip()
+    if not text or text.startswith('#'):
+        return None
+
+    if text.startswith('{'):
+        item = json.loads(text)
+        problem = check_fields(item)
+        if problem:
+            item["invalid"] = problem
+    elif '=>' in text:
+        premises, conclusion = text.rsplit('=>', 1)
+        item = {"premises": [p for p in premises.split(';') if p.strip()],
+                "conclusion": conclusion}
+    else:
+        item = {"formula": text}
+
+    item.setdefault("id", number)
+    return item
+
+
+def check_fields(item):
+    """Mensaje de error si un campo del item JSON tiene un tipo inválido, o None"""
+    for name in ("formula", "conclusion"):
+        if name in item and not isinstance(item[name], str):
+            return f"'{name}' must be a str"
+    premises = item.get("premises", [])
+    if not isinstance(premises, list) or not all(isinstance(p, str) for p in premises):
+        return "'premises' must be a list of strings"
+    if "max_iterations" in item:
+        value = item["max_iterations"]
+        # bool es subclase de int: true no es un presupuesto de 1
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+            return "'max_iterations' must be a positive integer"
+    return None
+
+
+def read_items(stream):
+    """Generar items de un flujo de texto sin cargarlo entero"""
+    for number, line in enumerate(stream, 1):
+        try:
+            item = parse_line(line, number)
+        except ValueError as e:
+            yield {"id": number, "invalid": f"Invalid JSON: {e}"}
+            continue
+        if item is not None:
+            yield item
+
+
+# ============================================================================
+# EVALUACION
+# ============================================================================
+
+def check_item(item, default_iterations=DEFAULT_ITERATIONS, stats=False, hooks=None,
+               snapshots=None):
+    """
+    Probar un item y retornar su registro de resultado. Con snapshots (un
+    directorio), la prueba que agota el presupuesto se guarda ahí para
+    continuarla con snapshot.py.
+    """
+    record = {"id": item.get("id")}
+    start = time.perf_counter()
+    try:
+        if "invalid" in item:
+            raise ValueError(item["invalid"])
+        prover = TableauProver(max_iterations=item.get("max_iterations", default_iterations),
+                               collect_stats=stats, hooks=hooks)
+        if "formula" in item:
+            record["valid"] = prover.prove(parse(item["formula"]))
+        elif "conclusion" in item:
+            premises = [parse(p) for p in item.get("premises", [])]
+            record["valid"] = prover.prove_argument(premises, parse(item["conclusion"]))
+        else:
+            raise ValueError("Item needs 'formula' or 'conclusion'")
+        # Agotar el presupuesto no decide el item: "valid" es false pero no
+        # es un contraejemplo
+        record["exhausted"] = prover.exhausted
+        if snapshots and prover.exhausted:
+            name = re.sub(r"[^\w.-]", "_", str(record["id"])) + ".snap"
+            record["snapshot"] = os.path.join(snapshots, name)
+            snapshot.save(record["snapshot"], prover.tableau, argument="conclusion" in item,
+                          max_iterations=prover.max_iterations)
+        if stats:
+            record["stats"] = prover.stats.as_dict()
+    except (ParseError, ValueError, TypeError) as e:
+        record["error"] = str(e)
+    record["elapsed_ms"] = round((time.perf_counter() - start) * 1000.0, 3)
+    return record
+
+
+def check_all(items, jobs=1, default_iterations=DEFAULT_ITERATIONS, window=None, stats=False,
+              hooks=None, snapshots=None):
+    """
+    Generar los registros en el orden de entrada.
+    Con jobs > 1 se usa un pool de procesos con a lo sumo 'window' items en
+    vuelo, de modo que la memoria no crece con el tamaño del corpus.
+    """
+    if jobs <= 1:
+        for item in items:
+            yield check_item(item, default_iterations, stats, hooks, snapshots)
+        return
+
+    window = window if window else jobs * 4
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(check_item, item, default_iterations, stats, None, snapshots))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# ============================================================================
+# RESUMEN
+# ============================================================================
+
+class Summary:
+    """Contadores acumulados en memoria constante"""
+
+    def __init__(self):
+        self.total = 0
+        self.valid = 0
+        self.invalid = 0
+        self.exhausted = 0
+        self.errors = 0
+        self.item_ms = 0.0
+        self.max_ms = 0.0
+        self.slowest = None
+
+    def add(self, record):
+        self.total += 1
+        if "error" in record:
+            self.errors += 1
+        elif record["valid"]:
+            self.valid += 1
+        elif record["exhausted"]:
+            self.exhausted += 1
+        else:
+            self.invalid += 1
+        ms = record["elapsed_ms"]
+        self.item_ms += ms
+        if ms >= self.max_ms:
+            self.max_ms = ms
+            self.slowest = record["id"]
+
+    def report(self, elapsed, stream):
+        mean = self.item_ms / self.total if self.total else 0.0
+        rate = self.total / elapsed if elapsed > 0 else 0.0
+        print(f"Items: {self.total}  Validos: {self.valid}  No validos: {self.invalid}  "
+              f"Agotadas: {self.exhausted}  Errores: {self.errors}", file=stream)
+        print(f"Tiempo: {elapsed:.2f}s  ({rate:.1f} items/s)  "
+              f"Media: {mean:.2f} ms  Max: {self.max_ms:.2f} ms (id {self.slowest})", file=stream)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Probar un corpus de formulas o argumentos")
+    parser.add_argument("input", nargs="?", default="-",
+                        help="Archivo de entrada (JSONL o texto); '-' para stdin")
+    parser.add_argument("-o", "--output", default="-", help="Archivo de salida JSONL; '-' para stdout")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="Procesos en paralelo")
+    parser.add_argument("--max-iterations", type=int, default=DEFAULT_ITERATIONS,
+                        help="Presupuesto por item (un item puede fijar el suyo)")
+    parser.add_argument("--stats", action="store_true",
+                        help="Incluir las estadisticas de cada prueba en su registro")
+    parser.add_argument("--profile", action="store_true",
+                        help="Imprimir un perfil agregado por regla al terminar (solo con --jobs 1)")
+    parser.add_argument("--spans", help="Agregar spans OpenTelemetry (OTLP/JSON) a este archivo "
+                                        "(solo con --jobs 1)")
+    parser.add_argument("--snapshots", help="Directorio donde guardar las pruebas que agotan "
+                                            "el presupuesto, para continuarlas con snapshot.py")
+    parser.add_argument("--quiet", action="store_true", help="No imprimir el resumen final")
+    args = parser.parse_args(argv)
+    if (args.profile or args.spans) and args.jobs > 1:
+        parser.error("--profile and --spans need --jobs 1")
+    if args.max_iterations < 1:
+        parser.error("--max-iterations must be at least 1")
+
+    profile = AggregateProfile() if args.profile else None
+    hooks = [h for h in (profile, SpanExporter(args.spans) if args.spans else None) if h]
+
+    if args.snapshots:
+        os.makedirs(args.snapshots, exist_ok=True)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    sink = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+
+    summary = Summary()
+    start = time.perf_counter()
+    try:
+        for record in check_all(read_items(source), args.jobs, args.max_iterations,
+                                stats=args.stats, hooks=hooks, snapshots=args.snapshots):
+            summary.add(record)
+            sink.write(json.dumps(record, ensure_ascii=False) + "\n")
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+    if not args.quiet:
+        summary.report(time.perf_counter() - start, sys.stderr)
+    if profile:
+        profile.print_stats(stream=sys.stderr)
+    return 1 if summary.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
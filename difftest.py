@@ -0,0 +1,363 @@
+"""
+Lógica Subatómica - Pruebas diferenciales: tableau contra busqueda de modelos
+
+Genera argumentos aleatorios (generate.py), los prueba con TableauProver y
+busca contramodelos por fuerza bruta en modelos finitos pequeños. Reporta
+cada desacuerdo reducido a un reproductor minimo.
+
+Semantica de los modelos (la semantica estandar de Q y S, sin ningun
+axioma propio del tableau, para que el oraculo sea independiente):
+    estados W = {0..n-1}, Q ⊆ W³, S ⊆ W², valuacion de terminos atomicos
+    A, x      A vale en x (Ā y Â: A no vale en ningun y con Sxy)
+    [A]B, x   para todo Qxyz: si A vale en y, B vale en z
+    <A>B, x   existe Qxyz con A en y y B en z
+
+Antes de comparar se comprueba que el oraculo refuta los argumentos
+invalidos de bench.MUST_FAIL.
+
+Desacuerdos:
+    refutada        el tableau la da por valida pero hay contramodelo (error)
+    sin contramodelo  el tableau no cierra (sin agotar el presupuesto) y no
+                    hay contramodelo de hasta --states estados. Puede faltar
+                    un modelo mas grande (cada particular pide estados
+                    nuevos), asi que solo falla con --strict.
+
+Las pruebas que agotan el presupuesto no se comparan. Antes de medir una
+optimizacion conviene correr, por ejemplo, --count 300 con dos semillas.
+
+Uso:
+    python difftest.py --count 300 --seed 1
+    python difftest.py --count 2000 --premises 3 --strict
+"""
+
+import argparse
+import itertools
+import sys
+import time
+
+from bench import MUST_FAIL
+from generate import FormulaGenerator
+from logic import (parse, TableauProver, AtomicTerm, Complement, Privation, Existential,
+                   Universal, Particular, Negation, Conjunction, Disjunction, Conditional,
+                   Biconditional)
+
+
+DEFAULT_ITERATIONS = 200
+MAX_STATES = 2
+
+
+# ============================================================================
+# TEXTO EN SINTAXIS DEL PARSER
+# ============================================================================
+
+def term_text(term):
+    if isinstance(term, Complement):
+        return '~' + term_text(term.term)
+    if isinstance(term, Privation):
+        return '^' + term_text(term.term)
+    return term.name
+
+
+BINARY_TEXT = {Conjunction: '&', Disjunction: '|', Biconditional: '<->'}
+
+
+def formula_text(formula):
+    """Inverso de parse (str usa simbolos que el parser no lee)"""
+    if isinstance(formula, Existential):
+        return term_text(formula.term)
+    if isinstance(formula, Universal):
+        return f"[{term_text(formula.subject)}]{term_text(formula.predicate)}"
+    if isinstance(formula, Particular):
+        return f"<{term_text(formula.subject)}>{term_text(formula.predicate)}"
+    if isinstance(formula, Negation):
+        return '-' + formula_text(formula.formula)
+    if isinstance(formula, Conditional):
+        return f"({formula_text(formula.antecedent)} -> {formula_text(formula.consequent)})"
+    return f"({formula_text(formula.left)} {BINARY_TEXT[type(formula)]} {formula_text(formula.right)})"
+
+
+def argument_text(premises, conclusion):
+    return "; ".join(formula_text(p) for p in premises) + " => " + formula_text(conclusion)
+
+
+# ============================================================================
+# BUSQUEDA DE MODELOS
+# ============================================================================
+
+def subformulas(formula):
+    """Todas las subformulas (incluida la formula)"""
+    yield formula
+    if isinstance(formula, Negation):
+        yield from subformulas(formula.formula)
+    elif isinstance(formula, Conditional):
+        yield from subformulas(formula.antecedent)
+        yield from subformulas(formula.consequent)
+    elif isinstance(formula, (Conjunction, Disjunction, Biconditional)):
+        yield from subformulas(formula.left)
+        yield from subformulas(formula.right)
+
+
+def atoms_of(term):
+    while not isinstance(term, AtomicTerm):
+        term = term.term
+    return term
+
+
+def columns(variables):
+    """
+    Columnas de la tabla de verdad de 'variables' variables como enteros:
+    el bit v de la columna i es el bit i de v. Evaluar con estas columnas
+    evalua todas las valuaciones a la vez.
+    """
+    rows = 1 << variables
+    full = (1 << rows) - 1
+    result = []
+    for i in range(variables):
+        width = 1 << i
+        block = ((1 << width) - 1) << width
+        result.append(block * (full // ((1 << (2 * width)) - 1)))
+    return full, result
+
+
+class Evaluator:
+    """Evaluacion de formulas en un marco (n, Q, S) para todas las valuaciones"""
+
+    def __init__(self, n, q, s, atom_index, full, cols):
+        self.n = n
+        self.q_from = [[(y, z) for (x, y, z) in q if x == state] for state in range(n)]
+        self.s_from = [[y for (x, y) in s if x == state] for state in range(n)]
+        self.q = q
+        self.atom_index = atom_index
+        self.full = full
+        self.cols = cols
+        self.k = len(atom_index)
+        self._terms = {}
+        self._formulas = {}
+
+    def term(self, term, x):
+        key = (term, x)
+        value = self._terms.get(key)
+        if value is None:
+            if isinstance(term, AtomicTerm):
+                value = self.cols[x * self.k + self.atom_index[term]]
+            else:
+                value = self.full
+                for y in self.s_from[x]:
+                    value &= ~self.term(term.term, y)
+                value &= self.full
+            self._terms[key] = value
+        return value
+
+    def value(self, formula, x):
+        key = (formula, x)
+        result = self._formulas.get(key)
+        if result is not None:
+            return result
+        full = self.full
+        if isinstance(formula, Existential):
+            result = self.term(formula.term, x)
+        elif isinstance(formula, Universal):
+            result = full
+            for y, z in self.q_from[x]:
+                result &= (full & ~self.term(formula.subject, y)) | self.term(formula.predicate, z)
+        elif isinstance(formula, Particular):
+            result = 0
+            for y, z in self.q_from[x]:
+                result |= self.term(formula.subject, y) & self.term(formula.predicate, z)
+        elif isinstance(formula, Negation):
+            result = full & ~self.value(formula.formula, x)
+        elif isinstance(formula, Conjunction):
+            result = self.value(formula.left, x) & self.value(formula.right, x)
+        elif isinstance(formula, Disjunction):
+            result = self.value(formula.left, x) | self.value(formula.right, x)
+        elif isinstance(formula, Conditional):
+            result = (full & ~self.value(formula.antecedent, x)) | self.value(formula.consequent, x)
+        else:
+            result = full & ~(self.value(formula.left, x) ^ self.value(formula.right, x))
+        self._formulas[key] = result
+        return result
+
+
+def countermodel(premises, conclusion, max_states=MAX_STATES):
+    """
+    Contramodelo de a lo sumo max_states estados (premisas verdaderas y
+    conclusion falsa en el estado 0), o None si no hay.
+    Retorna (n, Q, S, {(termino, estado) verdaderos}).
+    """
+    formulas = list(premises) + [conclusion]
+    subs = {f for formula in formulas for f in subformulas(formula)}
+    categorical = [f for f in subs if isinstance(f, (Universal, Particular))]
+    terms = set()
+    for f in subs:
+        if isinstance(f, Existential):
+            terms.add(f.term)
+        elif isinstance(f, (Universal, Particular)):
+            terms.update((f.subject, f.predicate))
+    atoms = sorted({atoms_of(t) for t in terms}, key=lambda a: a.name)
+    atom_index = {a: i for i, a in enumerate(atoms)}
+    uses_s = any(not isinstance(t, AtomicTerm) for t in terms)
+
+    for n in range(1, max_states + 1):
+        full, cols = columns(n * len(atoms))
+        triples = list(itertools.product(range(n), repeat=3)) if categorical else []
+        pairs = list(itertools.product(range(n), repeat=2)) if uses_s else []
+        for q_bits in range(1 << len(triples)):
+            q = [t for i, t in enumerate(triples) if q_bits >> i & 1]
+            for s_bits in range(1 << len(pairs)):
+                s = [p for i, p in enumerate(pairs) if s_bits >> i & 1]
+                model = Evaluator(n, q, s, atom_index, full, cols)
+                found = full & ~model.value(conclusion, 0)
+                for premise in premises:
+                    if not found:
+                        break
+                    found &= model.value(premise, 0)
+                if found:
+                    v = (found & -found).bit_length() - 1
+                    true = {(a.name, x) for a, i in atom_index.items()
+                            for x in range(n) if v >> (x * len(atoms) + i) & 1}
+                    return n, q, s, true
+    return None
+
+
+# ============================================================================
+# COMPARACION Y REDUCCION
+# ============================================================================
+
+def tableau_verdict(premises, conclusion, max_iterations=DEFAULT_ITERATIONS):
+    """True / False, o None si se agoto el presupuesto"""
+    prover = TableauProver(max_iterations=max_iterations)
+    result = prover.prove_argument(list(premises), conclusion)
+    return None if prover.exhausted else result
+
+
+def compare(premises, conclusion, max_iterations=DEFAULT_ITERATIONS, max_states=MAX_STATES,
+            strict=False):
+    """
+    (veredicto del tableau, desacuerdo). El veredicto es None si se agoto
+    el presupuesto (no se compara); el desacuerdo es 'refutada',
+    'sin contramodelo' (solo con strict) o None.
+    """
+    verdict = tableau_verdict(premises, conclusion, max_iterations)
+    if verdict is None:
+        return None, None
+    model = countermodel(premises, conclusion, max_states)
+    if verdict and model is not None:
+        return verdict, "refutada"
+    if strict and not verdict and model is None:
+        return verdict, "sin contramodelo"
+    return verdict, None
+
+
+def simpler_formulas(formula):
+    """Variantes un paso mas simples de una formula"""
+    if isinstance(formula, Negation):
+        yield formula.formula
+        for inner in simpler_formulas(formula.formula):
+            yield Negation(inner)
+    elif isinstance(formula, (Universal, Particular)):
+        yield Existential(formula.subject)
+        yield Existential(formula.predicate)
+        for subject in simpler_terms(formula.subject):
+            yield type(formula)(subject, formula.predicate)
+        for predicate in simpler_terms(formula.predicate):
+            yield type(formula)(formula.subject, predicate)
+    elif isinstance(formula, Existential):
+        for term in simpler_terms(formula.term):
+            yield Existential(term)
+    else:
+        if isinstance(formula, Conditional):
+            left, right = formula.antecedent, formula.consequent
+        else:
+            left, right = formula.left, formula.right
+        yield left
+        yield right
+        for inner in simpler_formulas(left):
+            yield type(formula)(inner, right)
+        for inner in simpler_formulas(right):
+            yield type(formula)(left, inner)
+
+
+def simpler_terms(term):
+    if not isinstance(term, AtomicTerm):
+        yield term.term
+        for inner in simpler_terms(term.term):
+            yield type(term)(inner)
+
+
+def shrink(premises, conclusion, still_fails):
+    """
+    Reducir el argumento mientras still_fails(premisas, conclusion) siga
+    siendo cierto: quitar premisas y reemplazar subformulas por partes.
+    """
+    premises = list(premises)
+    progress = True
+    while progress:
+        progress = False
+        candidates = [(premises[:i] + premises[i + 1:], conclusion) for i in range(len(premises))]
+        for i, premise in enumerate(premises):
+            candidates += [(premises[:i] + [p] + premises[i + 1:], conclusion)
+                           for p in simpler_formulas(premise)]
+        candidates += [(premises, c) for c in simpler_formulas(conclusion)]
+        for candidate in candidates:
+            if still_fails(*candidate):
+                premises, conclusion = candidate
+                progress = True
+                break
+    return premises, conclusion
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Comparar el tableau con una busqueda de contramodelos")
+    parser.add_argument("--count", type=int, default=300)
+    parser.add_argument("--premises", type=int, default=2)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--terms", type=int, default=3)
+    parser.add_argument("--quantifiers", type=float, default=0.6)
+    parser.add_argument("--operators", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--states", type=int, default=MAX_STATES,
+                        help="Estados maximos de los contramodelos")
+    parser.add_argument("--max-iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--strict", action="store_true",
+                        help="Fallar tambien si no hay contramodelo pequeño de una no valida")
+    args = parser.parse_args(argv)
+
+    blind = [name for name, (texts, text) in MUST_FAIL.items()
+             if countermodel([parse(t) for t in texts], parse(text), args.states) is None]
+    if blind:
+        print(f"El oraculo no refuta: {', '.join(blind)}")
+        return 2
+
+    generator = FormulaGenerator(args.seed, args.depth, args.terms, args.quantifiers, args.operators)
+    check = lambda p, c: compare(p, c, args.max_iterations, args.states, args.strict)[1]
+
+    start = time.perf_counter()
+    counts = {"valida": 0, "no valida": 0, "agotada": 0}
+    failures = 0
+    for i in range(args.count):
+        texts, conclusion_text = generator.argument(args.premises)
+        premises = [parse(t) for t in texts]
+        conclusion = parse(conclusion_text)
+
+        verdict, kind = compare(premises, conclusion, args.max_iterations, args.states, args.strict)
+        counts["agotada" if verdict is None else "valida" if verdict else "no valida"] += 1
+        if kind is None:
+            continue
+
+        failures += 1
+        small = shrink(premises, conclusion, lambda p, c: check(p, c) == kind)
+        print(f"[{kind}] item {i}: {argument_text(premises, conclusion)}")
+        print(f"    reducido: {argument_text(*small)}")
+        model = countermodel(*small, args.states)
+        if model is not None:
+            n, q, s, true = model
+            print(f"    contramodelo: {n} estados, Q={q}, S={s}, verdaderos={sorted(true)}")
+
+    elapsed = time.perf_counter() - start
+    print(f"Items: {args.count}  Validos: {counts['valida']}  No validos: {counts['no valida']}  "
+          f"Agotados: {counts['agotada']}  Desacuerdos: {failures}  ({elapsed:.1f}s)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
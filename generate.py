@@ -0,0 +1,107 @@
+"""
+Lógica Subatómica - Generador aleatorio de formulas y argumentos
+
+Genera texto en la sintaxis del parser (no objetos), de modo que lo generado
+sirve igual para el probador, para cli.py o para el servicio HTTP. Con la
+misma semilla y los mismos parametros la salida es siempre la misma.
+
+Parametros:
+    depth        profundidad maxima de conectivos (-, &, |, ->, <->)
+    terms        cantidad de terminos atomicos distintos (A, B, C, ...)
+    quantifiers  probabilidad de que una hoja sea categorial ([S]P o <S>P)
+                 en lugar de un termino existencial
+    operators    probabilidad de aplicar ~ o ^ a un termino de una
+                 formula categorial (se repite: ~~A, ~^A, ...)
+
+Uso:
+    python generate.py --count 1000 --premises 3 --depth 2 --seed 7 > corpus.jsonl
+    python cli.py corpus.jsonl --jobs 4
+"""
+
+import argparse
+import json
+import random
+import string
+import sys
+
+
+BINARY = ('&', '|', '->', '<->')
+MAX_TERM_OPERATORS = 2
+
+
+def term_names(count):
+    """A, B, ..., Z y luego T26, T27, ... (identificadores validos del parser)"""
+    letters = string.ascii_uppercase
+    return [letters[i] if i < len(letters) else f"T{i}" for i in range(count)]
+
+
+class FormulaGenerator:
+    """Generador con semilla de formulas y argumentos en texto"""
+
+    def __init__(self, seed=0, depth=2, terms=4, quantifiers=0.6, operators=0.2):
+        if terms < 1:
+            raise ValueError("'terms' must be at least 1")
+        self.rng = random.Random(seed)
+        self.depth = depth
+        self.names = term_names(terms)
+        self.quantifiers = quantifiers
+        self.operators = operators
+
+    def term(self):
+        """Termino con operadores ~ y ^ (el parser solo los acepta en categoriales)"""
+        text = self.rng.choice(self.names)
+        for _ in range(MAX_TERM_OPERATORS):
+            if self.rng.random() >= self.operators:
+                break
+            text = self.rng.choice('~^') + text
+        return text
+
+    def leaf(self):
+        if self.rng.random() < self.quantifiers:
+            subject, predicate = self.term(), self.term()
+            if self.rng.random() < 0.5:
+                return f"[{subject}]{predicate}"
+            return f"<{subject}>{predicate}"
+        return self.rng.choice(self.names)
+
+    def formula(self, depth=None):
+        """Formula con a lo sumo 'depth' niveles de conectivos"""
+        depth = self.depth if depth is None else depth
+        # Las hojas tambien aparecen antes del limite, para variar la forma
+        if depth <= 0 or self.rng.random() < 0.2:
+            return self.leaf()
+        if self.rng.random() < 0.2:
+            return f"-{self.formula(depth - 1)}"
+        operator = self.rng.choice(BINARY)
+        return f"({self.formula(depth - 1)} {operator} {self.formula(depth - 1)})"
+
+    def argument(self, premises=2):
+        """Argumento: (lista de premisas, conclusion)"""
+        return [self.formula() for _ in range(premises)], self.formula()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generar un corpus aleatorio (JSONL para cli.py)")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--premises", type=int, default=0,
+                        help="Premisas por argumento (0: formulas sueltas)")
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--terms", type=int, default=4)
+    parser.add_argument("--quantifiers", type=float, default=0.6)
+    parser.add_argument("--operators", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    generator = FormulaGenerator(args.seed, args.depth, args.terms, args.quantifiers, args.operators)
+    for i in range(args.count):
+        if args.premises:
+            premises, conclusion = generator.argument(args.premises)
+            item = {"id": i, "premises": premises, "conclusion": conclusion}
+        else:
+            item = {"id": i, "formula": generator.formula()}
+        sys.stdout.write(json.dumps(item) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Lógica Subatómica - Pruebas en segundo plano
+Pool acotado de hilos que ejecuta pruebas con progreso consultable y cancelación
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from logic import ProofCancelled, run_steps
+
+
+class PoolBusy(Exception):
+    """No quedan plazas libres en el pool de pruebas"""
+    pass
+
+
+class ProofJob:
+    """Manejador de una prueba lanzada en segundo plano"""
+
+    def __init__(self, budget=None):
+        self.budget = budget        # Iteraciones maximas (solo informativo)
+        self.iteration = 0
+        self.open_branches = 1
+        self.future = None
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        """Pedir que la busqueda se detenga en la siguiente iteracion"""
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def done(self):
+        return self.future is not None and self.future.done()
+
+    def result(self):
+        """Resultado de la prueba (relanza ProofCancelled o el error original)"""
+        return self.future.result()
+
+    def drive(self, steps):
+        """
+        Consumir un generador de prove_steps actualizando el progreso.
+        Lanza ProofCancelled si se pidio cancelar.
+        """
+        while True:
+            if self._cancel.is_set():
+                steps.close()
+                raise ProofCancelled(f"Cancelada en la iteracion {self.iteration}")
+            try:
+                self.iteration, self.open_branches = next(steps)
+            except StopIteration as stop:
+                return stop.value
+
+
+def drive(steps, job=None):
+    """Ejecutar pasos a traves de un job si lo hay, o directamente"""
+    if job is None:
+        return run_steps(steps)
+    return job.drive(steps)
+
+
+class JobPool:
+    """Pool acotado de trabajadores para pruebas en segundo plano"""
+
+    def __init__(self, max_workers=4, max_pending=16):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix="prover")
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def submit(self, fn, *args, budget=None, **kwargs):
+        """
+        Lanzar fn(*args, _job=job, **kwargs) en segundo plano y retornar el job.
+        Lanza PoolBusy si ya hay max_pending pruebas en curso o en cola.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise PoolBusy("Demasiadas pruebas en curso, intenta de nuevo")
+
+        job = ProofJob(budget)
+        try:
+            job.future = self.executor.submit(fn, *args, _job=job, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+        job.future.add_done_callback(lambda _: self._slots.release())
+        return job
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,113 @@
+"""
+Lógica Subatómica - Prueba de carga del servicio HTTP
+
+Lanza clientes concurrentes contra service.py durante un tiempo fijo y reporta
+throughput y latencias (p50, p90, p99) por endpoint.
+
+Uso:
+    python service.py --port 8765 &
+    python loadtest.py --url http://127.0.0.1:8765 --clients 16 --duration 10
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+
+
+# Mezcla de peticiones: silogismos clasicos y formulas del app
+WORKLOAD = [
+    ("/prove-argument", {"premises": ["[M]P", "[S]M"], "conclusion": "[S]P"}),
+    ("/prove-argument", {"premises": ["-<M>P", "[S]M"], "conclusion": "-<S>P"}),
+    ("/prove-argument", {"premises": ["[M]P", "<S>M"], "conclusion": "<S>P"}),
+    ("/prove-argument", {"premises": ["-<M>P", "<S>M"], "conclusion": "<S>~P"}),
+    ("/prove", {"formula": "A | -A"}),
+    ("/prove", {"formula": "-(A & -A)"}),
+    ("/prove", {"formula": "(A & (A -> B)) -> B"}),
+    ("/prove", {"formula": "((A -> B) & (B -> C)) -> (A -> C)"}),
+    ("/parse", {"formula": "([A]B & [B]C) -> [A]C"}),
+]
+
+
+def percentile(values, q):
+    """Percentil q (0-100) por el metodo del rango mas cercano"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(q / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def post(url, payload, timeout):
+    data = json.dumps(payload).encode("utf-8")
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def client(base_url, workload, deadline, timeout, seed, samples, errors, lock):
+    """Bucle de un cliente: peticiones aleatorias hasta el deadline"""
+    rng = random.Random(seed)
+    local = []
+    failed = 0
+    while time.perf_counter() < deadline:
+        path, payload = rng.choice(workload)
+        start = time.perf_counter()
+        try:
+            post(base_url + path, payload, timeout)
+        except (urllib.error.URLError, OSError):
+            failed += 1
+            continue
+        local.append((path, (time.perf_counter() - start) * 1000.0))
+    with lock:
+        samples.extend(local)
+        errors[0] += failed
+
+
+def run(base_url, clients=8, duration=10.0, timeout=60.0, seed=0, workload=WORKLOAD):
+    """Ejecutar la prueba de carga y retornar (samples, errores, segundos)"""
+    samples = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=client,
+                         args=(base_url, workload, deadline, timeout, seed + i, samples, errors, lock))
+        for i in range(clients)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return samples, errors[0], time.perf_counter() - start
+
+
+def report(samples, errors, elapsed):
+    """Imprimir throughput y percentiles, globales y por endpoint"""
+    print(f"Peticiones: {len(samples)}  Errores: {errors}  Tiempo: {elapsed:.2f}s")
+    print(f"Throughput: {len(samples) / elapsed:.1f} req/s\n")
+    print(f"{'endpoint':<18}{'n':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+
+    groups = {"(total)": [ms for _, ms in samples]}
+    for path, ms in samples:
+        groups.setdefault(path, []).append(ms)
+    for path, values in groups.items():
+        print(f"{path:<18}{len(values):>8}{percentile(values, 50):>10.2f}"
+              f"{percentile(values, 90):>10.2f}{percentile(values, 99):>10.2f}"
+              f"{max(values, default=0.0):>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de carga para service.py")
+    parser.add_argument("--url", default="http://127.0.0.1:8765")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos de carga")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    report(*run(args.url.rstrip("/"), args.clients, args.duration, args.timeout, args.seed))
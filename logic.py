@@ -3,191 +3,284 @@ Lógica Subatómica - Sistema de Representación de Fórmulas
 Paso 1: Clases para términos y fórmulas
 """
 
+import asyncio
+import functools
+import json
+import os
+import re
+import threading
+import time
+import tracemalloc
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+
 # ============================================================================
 # TÉRMINOS
 # ============================================================================
 
-class Term:
+_set = object.__setattr__
+
+
+class Immutable:
+    """
+    Base de términos y fórmulas. Son inmutables para poder compartirlos
+    (cache del parser, internado) y guardan su hash precalculado.
+    """
+    __slots__ = ('_hash', '__weakref__')
+    _fields = ()
+    
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+    
+    def __delattr__(self, name):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+    
+    def __reduce__(self):
+        return (self.__class__, tuple(getattr(self, f) for f in self._fields))
+
+
+class Term(Immutable):
     """Clase base para términos"""
-    pass
+    __slots__ = ('_existential',)   # Cache de existential_of
 
 class AtomicTerm(Term):
-    """Término atómico: A, B, C, etc."""
-    def __init__(self, name):
-        self.name = name
+    """
+    Término atómico: A, B, Mammal, T123, etc.
+    Se interna por nombre: mientras un símbolo esté en uso hay una sola
+    instancia, así que comparar términos no compara cadenas. La tabla es
+    débil (como la de intern_node): los símbolos que ya nadie usa se liberan,
+    y un proceso que recibe nombres arbitrarios no crece sin límite. Fuera
+    del proceso (serialización, caches) el término se identifica por nombre.
+    """
+    __slots__ = ('name',)
+    _fields = ('name',)
+    _symbols = weakref.WeakValueDictionary()    # nombre -> instancia
+    _lock = threading.Lock()
+    
+    def __new__(cls, name):
+        term = cls._symbols.get(name)
+        if term is None:
+            with cls._lock:
+                term = cls._symbols.get(name)
+                if term is None:
+                    term = object.__new__(cls)
+                    _set(term, 'name', name)
+                    _set(term, '_hash', hash(('atomic', name)))
+                    cls._symbols[name] = term
+        return term
     
     def __str__(self):
         return self.name
     
     def __eq__(self, other):
-        return isinstance(other, AtomicTerm) and self.name == other.name
+        return self is other or (isinstance(other, AtomicTerm) and self.name == other.name)
     
     def __hash__(self):
-        return hash(('atomic', self.name))
+        return self._hash
 
 class Complement(Term):
     """Complemento de un término: Ā (no-A)"""
+    __slots__ = ('term',)
+    _fields = ('term',)
+    
     def __init__(self, term):
-        self.term = term
+        _set(self, 'term', term)
+        _set(self, '_hash', hash(('complement', term)))
     
     def __str__(self):
         return f"{self.term}\u0304"  # Unicode combining overline
     
     def __eq__(self, other):
-        return isinstance(other, Complement) and self.term == other.term
+        return self is other or (isinstance(other, Complement) and self.term == other.term)
     
     def __hash__(self):
-        return hash(('complement', self.term))
+        return self._hash
 
 class Privation(Term):
     """Privación de un término: Â (in-A)"""
+    __slots__ = ('term',)
+    _fields = ('term',)
+    
     def __init__(self, term):
-        self.term = term
+        _set(self, 'term', term)
+        _set(self, '_hash', hash(('privation', term)))
     
     def __str__(self):
         return f"{self.term}\u0302"  # Unicode combining circumflex
     
     def __eq__(self, other):
-        return isinstance(other, Privation) and self.term == other.term
+        return self is other or (isinstance(other, Privation) and self.term == other.term)
     
     def __hash__(self):
-        return hash(('privation', self.term))
+        return self._hash
 
 
 # ============================================================================
 # FÓRMULAS
 # ============================================================================
 
-class Formula:
+class Formula(Immutable):
     """Clase base para fórmulas"""
-    pass
+    __slots__ = ('_negation',)      # Cache de negation_of
 
 class Existential(Formula):
     """Fórmula existencial: A (existe A)"""
+    __slots__ = ('term',)
+    _fields = ('term',)
+    
     def __init__(self, term):
-        self.term = term
+        _set(self, 'term', term)
+        _set(self, '_hash', hash(('existential', term)))
     
     def __str__(self):
         return str(self.term)
     
     def __eq__(self, other):
-        return isinstance(other, Existential) and self.term == other.term
+        return self is other or (isinstance(other, Existential) and self.term == other.term)
     
     def __hash__(self):
-        return hash(('existential', self.term))
+        return self._hash
 
 class Universal(Formula):
     """Fórmula universal: [A]B (todo A es B)"""
+    __slots__ = ('subject', 'predicate')
+    _fields = ('subject', 'predicate')
+    
     def __init__(self, subject, predicate):
-        self.subject = subject
-        self.predicate = predicate
+        _set(self, 'subject', subject)
+        _set(self, 'predicate', predicate)
+        _set(self, '_hash', hash(('universal', subject, predicate)))
     
     def __str__(self):
         return f"[{self.subject}]{self.predicate}"
     
     def __eq__(self, other):
-        return (isinstance(other, Universal) and 
-                self.subject == other.subject and 
-                self.predicate == other.predicate)
+        return self is other or (isinstance(other, Universal) and 
+                                 self.subject == other.subject and 
+                                 self.predicate == other.predicate)
     
     def __hash__(self):
-        return hash(('universal', self.subject, self.predicate))
+        return self._hash
 
 class Particular(Formula):
     """Fórmula particular: 《A》B (algún A es B)"""
+    __slots__ = ('subject', 'predicate')
+    _fields = ('subject', 'predicate')
+    
     def __init__(self, subject, predicate):
-        self.subject = subject
-        self.predicate = predicate
+        _set(self, 'subject', subject)
+        _set(self, 'predicate', predicate)
+        _set(self, '_hash', hash(('particular', subject, predicate)))
     
     def __str__(self):
         return f"《{self.subject}》{self.predicate}"
     
     def __eq__(self, other):
-        return (isinstance(other, Particular) and 
-                self.subject == other.subject and 
-                self.predicate == other.predicate)
+        return self is other or (isinstance(other, Particular) and 
+                                 self.subject == other.subject and 
+                                 self.predicate == other.predicate)
     
     def __hash__(self):
-        return hash(('particular', self.subject, self.predicate))
+        return self._hash
 
 class Negation(Formula):
     """Negación: ¬φ"""
+    __slots__ = ('formula',)
+    _fields = ('formula',)
+    
     def __init__(self, formula):
-        self.formula = formula
+        _set(self, 'formula', formula)
+        _set(self, '_hash', hash(('negation', formula)))
     
     def __str__(self):
         return f"¬{self.formula}"
     
     def __eq__(self, other):
-        return isinstance(other, Negation) and self.formula == other.formula
+        return self is other or (isinstance(other, Negation) and self.formula == other.formula)
     
     def __hash__(self):
-        return hash(('negation', self.formula))
+        return self._hash
 
 class Conjunction(Formula):
     """Conjunción: φ ∧ ψ"""
+    __slots__ = ('left', 'right')
+    _fields = ('left', 'right')
+    
     def __init__(self, left, right):
-        self.left = left
-        self.right = right
+        _set(self, 'left', left)
+        _set(self, 'right', right)
+        _set(self, '_hash', hash(('conjunction', left, right)))
     
     def __str__(self):
         return f"({self.left} ∧ {self.right})"
     
     def __eq__(self, other):
-        return (isinstance(other, Conjunction) and 
-                self.left == other.left and self.right == other.right)
+        return self is other or (isinstance(other, Conjunction) and 
+                                 self.left == other.left and self.right == other.right)
     
     def __hash__(self):
-        return hash(('conjunction', self.left, self.right))
+        return self._hash
 
 class Disjunction(Formula):
     """Disyunción: φ ∨ ψ"""
+    __slots__ = ('left', 'right')
+    _fields = ('left', 'right')
+    
     def __init__(self, left, right):
-        self.left = left
-        self.right = right
+        _set(self, 'left', left)
+        _set(self, 'right', right)
+        _set(self, '_hash', hash(('disjunction', left, right)))
     
     def __str__(self):
         return f"({self.left} ∨ {self.right})"
     
     def __eq__(self, other):
-        return (isinstance(other, Disjunction) and 
-                self.left == other.left and self.right == other.right)
+        return self is other or (isinstance(other, Disjunction) and 
+                                 self.left == other.left and self.right == other.right)
     
     def __hash__(self):
-        return hash(('disjunction', self.left, self.right))
+        return self._hash
 
 class Conditional(Formula):
     """Condicional: φ → ψ"""
+    __slots__ = ('antecedent', 'consequent')
+    _fields = ('antecedent', 'consequent')
+    
     def __init__(self, antecedent, consequent):
-        self.antecedent = antecedent
-        self.consequent = consequent
+        _set(self, 'antecedent', antecedent)
+        _set(self, 'consequent', consequent)
+        _set(self, '_hash', hash(('conditional', antecedent, consequent)))
     
     def __str__(self):
         return f"({self.antecedent} → {self.consequent})"
     
     def __eq__(self, other):
-        return (isinstance(other, Conditional) and 
-                self.antecedent == other.antecedent and 
-                self.consequent == other.consequent)
+        return self is other or (isinstance(other, Conditional) and 
+                                 self.antecedent == other.antecedent and 
+                                 self.consequent == other.consequent)
     
     def __hash__(self):
-        return hash(('conditional', self.antecedent, self.consequent))
+        return self._hash
 
 class Biconditional(Formula):
     """Bicondicional: φ ↔ ψ"""
+    __slots__ = ('left', 'right')
+    _fields = ('left', 'right')
+    
     def __init__(self, left, right):
-        self.left = left
-        self.right = right
+        _set(self, 'left', left)
+        _set(self, 'right', right)
+        _set(self, '_hash', hash(('biconditional', left, right)))
     
     def __str__(self):
         return f"({self.left} ↔ {self.right})"
     
     def __eq__(self, other):
-        return (isinstance(other, Biconditional) and 
-                self.left == other.left and self.right == other.right)
+        return self is other or (isinstance(other, Biconditional) and 
+                                 self.left == other.left and self.right == other.right)
     
     def __hash__(self):
-        return hash(('biconditional', self.left, self.right))
+        return self._hash
 
 
 # ============================================================================
@@ -202,12 +295,87 @@ class ParseError(Exception):
     """Error durante el parsing"""
     pass
 
+# Un solo lexer compilado para todo el corpus: operadores (los de varios
+# caracteres primero), palabras o cualquier otro carácter suelto, que se
+# rechaza después con un mensaje según el contexto. Una palabra es un
+# identificador si empieza por mayúscula.
+_TOKEN_RE = re.compile(r"\s*(<->|->|\w+|\S)")
+
+END = ''    # Token centinela de fin de texto
+
+# Conectivos binarios: (precedencia, asociativo a la derecha, constructor)
+BINARY_OPERATORS = {
+    '<->': (1, True, Biconditional),
+    '->': (2, True, Conditional),
+    '|': (3, False, Disjunction),
+    '&': (4, False, Conjunction),
+}
+
+TERM_OPERATORS = {
+    '~': Complement,
+    '^': Privation,
+}
+
+
+PARSE_CACHE_SIZE = 4096
+
+# Tabla de internado: una sola instancia por término o fórmula estructural
+_interned = weakref.WeakValueDictionary()
+
+
+def intern_node(node):
+    """Retornar la instancia canónica (compartida) de un término o fórmula"""
+    return _interned.setdefault(node, node)
+
+
+# Las fórmulas forman un DAG: el parser interna cada subfórmula y las reglas
+# piden las fórmulas derivadas (¬φ, el existencial de un término) a estos
+# constructores, que las guardan en el nodo de origen. Así cada rama y cada
+# aplicación comparten el mismo nodo en lugar de construir uno nuevo, y la
+# memoria crece con las subfórmulas distintas, no con las aplicaciones.
+
+def negation_of(formula):
+    """¬formula como nodo internado (construido una sola vez por nodo)"""
+    try:
+        return formula._negation
+    except AttributeError:
+        node = intern_node(Negation(formula))
+        _set(formula, '_negation', node)
+        return node
+
+
+def existential_of(term):
+    """El término como fórmula existencial internada (una sola vez por término)"""
+    try:
+        return term._existential
+    except AttributeError:
+        node = intern_node(Existential(term))
+        _set(term, '_existential', node)
+        return node
+
+
+def tokenize(text):
+    """Dividir el texto en tokens en una sola pasada (termina con END)"""
+    tokens = _TOKEN_RE.findall(text)
+    tokens.append(END)
+    return tokens
+
+
+def token_position(text, index):
+    """Posición en el texto del token número index (solo se usa en errores)"""
+    for i, m in enumerate(_TOKEN_RE.finditer(text)):
+        if i == index:
+            return m.start(1)
+    return len(text)
+
+
 class Parser:
     """Parser para fórmulas de lógica subatómica
     
     Sintaxis:
         Términos:
-            A, B, C, ...     - términos atómicos
+            A, B, Mammal, T123, ...
+                             - términos atómicos (empiezan por mayúscula)
             ~A               - complemento
             ^A               - privación
         
@@ -221,164 +389,329 @@ class Parser:
             φ -> ψ           - condicional
             φ <-> ψ          - bicondicional
             (φ)              - paréntesis
+    
+    El parser es iterativo (shunting-yard): cadenas largas de negaciones o
+    anidamientos profundos no consumen pila de Python.
     """
     
     def __init__(self, text):
-        self.text = text.replace(' ', '')  # Eliminar espacios
+        self.text = text
+        self.tokens = tokenize(text)
         self.pos = 0
     
-    def peek(self, offset=0):
-        """Mirar el carácter actual sin consumirlo"""
-        pos = self.pos + offset
-        if pos < len(self.text):
-            return self.text[pos]
-        return None
+    def current(self):
+        """Token actual para mensajes de error (None al final)"""
+        return self.tokens[self.pos] or None
+    
+    def error_position(self):
+        """Posición en el texto del token actual"""
+        return token_position(self.text, self.pos)
     
-    def consume(self):
-        """Consumir y retornar el carácter actual"""
-        if self.pos < len(self.text):
-            char = self.text[self.pos]
+    def expect(self, token):
+        """Consumir un token esperado o lanzar error"""
+        if self.tokens[self.pos] == token:
             self.pos += 1
-            return char
-        return None
+            return
+        raise ParseError(f"Expected '{token}' at position {self.error_position()}, "
+                         f"got '{self.current()}'")
     
-    def expect(self, char):
-        """Consumir un carácter esperado o lanzar error"""
-        if self.peek() == char:
-            return self.consume()
-        raise ParseError(f"Expected '{char}' at position {self.pos}, got '{self.peek()}'")
+    def combine(self, operator, left, right):
+        """Construir (internada) la fórmula de un conectivo binario"""
+        return intern_node(BINARY_OPERATORS[operator][2](left, right))
     
     def parse_term(self):
-        """Parsear un término"""
-        # Complemento: ~A
-        if self.peek() == '~':
-            self.consume()
-            inner = self.parse_term()
-            return Complement(inner)
-        
-        # Privación: ^A
-        if self.peek() == '^':
-            self.consume()
-            inner = self.parse_term()
-            return Privation(inner)
-        
-        # Término atómico: letra mayúscula
-        char = self.peek()
-        if char and char.isupper():
-            self.consume()
-            return AtomicTerm(char)
-        
-        raise ParseError(f"Expected term at position {self.pos}")
-    
-    def parse_primary(self):
-        """Parsear fórmula primaria (atómica, categorial, o entre paréntesis)"""
-        # Negación: -φ
-        if self.peek() == '-':
-            self.consume()
-            formula = self.parse_primary()
-            return Negation(formula)
-        
-        # Paréntesis: (φ)
-        if self.peek() == '(':
-            self.consume()
-            formula = self.parse_biconditional()
-            self.expect(')')
-            return formula
+        """Parsear un término: operadores ~ y ^ seguidos de un identificador"""
+        tokens = self.tokens
+        start = pos = self.pos
+        while tokens[pos] in TERM_OPERATORS:
+            pos += 1
+        
+        name = tokens[pos]
+        if not name[:1].isupper():
+            self.pos = pos
+            raise ParseError(f"Expected term at position {self.error_position()}")
+        
+        term = intern_node(AtomicTerm(name))
+        for i in range(pos - 1, start - 1, -1):
+            term = intern_node(TERM_OPERATORS[tokens[i]](term))
+        self.pos = pos + 1
+        return term
+    
+    def parse_atom(self):
+        """Parsear una fórmula atómica: existencial, universal o particular"""
+        token = self.tokens[self.pos]
         
         # Universal: [A]B
-        if self.peek() == '[':
-            self.consume()
+        if token == '[':
+            self.pos += 1
             subject = self.parse_term()
             self.expect(']')
-            predicate = self.parse_term()
-            return Universal(subject, predicate)
+            return intern_node(Universal(subject, self.parse_term()))
         
         # Particular: <A>B
-        if self.peek() == '<':
-            self.consume()
+        if token == '<':
+            self.pos += 1
             subject = self.parse_term()
             self.expect('>')
-            predicate = self.parse_term()
-            return Particular(subject, predicate)
-        
-        # Existencial o término simple: A
-        if self.peek() and self.peek().isupper():
-            term = self.parse_term()
-            return Existential(term)
-        
-        raise ParseError(f"Unexpected character at position {self.pos}: '{self.peek()}'")
-    
-    def parse_conjunction(self):
-        """Parsear conjunción: φ & ψ"""
-        left = self.parse_primary()
-        
-        while self.peek() == '&':
-            self.consume()
-            right = self.parse_primary()
-            left = Conjunction(left, right)
-        
-        return left
-    
-    def parse_disjunction(self):
-        """Parsear disyunción: φ | ψ"""
-        left = self.parse_conjunction()
-        
-        while self.peek() == '|':
-            self.consume()
-            right = self.parse_conjunction()
-            left = Disjunction(left, right)
-        
-        return left
-    
-    def parse_conditional(self):
-        """Parsear condicional: φ -> ψ"""
-        left = self.parse_disjunction()
+            return intern_node(Particular(subject, self.parse_term()))
         
-        if self.peek() == '-' and self.peek(1) == '>':
-            self.consume()  # -
-            self.consume()  # >
-            right = self.parse_conditional()
-            return Conditional(left, right)
+        # Existencial: A
+        if token[:1].isupper():
+            return intern_node(Existential(self.parse_term()))
         
-        return left
-    
-    def parse_biconditional(self):
-        """Parsear bicondicional: φ <-> ψ"""
-        left = self.parse_conditional()
-        
-        if self.peek() == '<' and self.peek(1) == '-' and self.peek(2) == '>':
-            self.consume()  # <
-            self.consume()  # -
-            self.consume()  # >
-            right = self.parse_biconditional()
-            return Biconditional(left, right)
-        
-        return left
+        raise ParseError(f"Unexpected character at position {self.error_position()}: "
+                         f"'{self.current()}'")
     
     def parse(self):
         """Parsear una fórmula completa"""
-        formula = self.parse_biconditional()
+        tokens = self.tokens
+        operands = []       # Operandos izquierdos pendientes
+        operators = []      # '-', '(' u operadores binarios pendientes
+        
+        while True:
+            # Se espera un operando, quizá precedido de negaciones y paréntesis
+            token = tokens[self.pos]
+            while token == '-' or token == '(':
+                operators.append(token)
+                self.pos += 1
+                token = tokens[self.pos]
+            operand = self.parse_atom()
+            
+            # Cerrar negaciones pendientes y paréntesis que terminan aquí
+            while True:
+                while operators and operators[-1] == '-':
+                    operators.pop()
+                    operand = intern_node(Negation(operand))
+                if tokens[self.pos] != ')' or '(' not in operators:
+                    break
+                self.pos += 1
+                while operators[-1] != '(':
+                    operand = self.combine(operators.pop(), operands.pop(), operand)
+                operators.pop()
+            
+            token = tokens[self.pos]
+            if token not in BINARY_OPERATORS:
+                break
+            
+            # Reducir los operadores de mayor precedencia antes de apilar este
+            precedence, right_assoc, _ = BINARY_OPERATORS[token]
+            while operators and operators[-1] in BINARY_OPERATORS:
+                top = BINARY_OPERATORS[operators[-1]][0]
+                if top < precedence or (top == precedence and right_assoc):
+                    break
+                operand = self.combine(operators.pop(), operands.pop(), operand)
+            operands.append(operand)
+            operators.append(token)
+            self.pos += 1
         
-        if self.pos < len(self.text):
-            raise ParseError(f"Unexpected characters after formula: '{self.text[self.pos:]}'")
+        while operators:
+            if operators[-1] == '(':
+                self.expect(')')
+            operand = self.combine(operators.pop(), operands.pop(), operand)
         
-        return formula
+        if tokens[self.pos] != END:
+            raise ParseError(f"Unexpected characters after formula: '{self.text[self.error_position():]}'")
+        
+        return operand
 
 
-def parse(text):
-    """Función auxiliar para parsear fórmulas"""
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_normalized(text):
     return Parser(text).parse()
 
 
+def parse(text):
+    """
+    Función auxiliar para parsear fórmulas.
+    Usa una cache LRU indexada por el texto con los espacios normalizados;
+    las fórmulas retornadas son internadas e inmutables, seguras de compartir.
+    """
+    try:
+        return _parse_normalized(' '.join(text.split()))
+    except ParseError:
+        # Repetir sobre el texto original para reportar posiciones exactas
+        return Parser(text).parse()
+
+
+def parse_cache_info():
+    """Contadores de la cache del parser (hits, misses, maxsize, currsize)"""
+    return _parse_normalized.cache_info()
+
+
+def parse_cache_clear():
+    """Vaciar la cache del parser"""
+    _parse_normalized.cache_clear()
+
+
+def parse_many(texts):
+    """
+    Parsear un corpus completo reutilizando el mismo lexer compilado
+    y la cache del parser (los corpus repiten muchas premisas).
+    Retorna la lista de fórmulas; un error indica el índice del texto.
+    """
+    formulas = []
+    for index, text in enumerate(texts):
+        try:
+            formulas.append(parse(text))
+        except ParseError as e:
+            raise ParseError(f"Item {index}: {e}") from None
+    return formulas
+
+
+# ============================================================================
+# SERIALIZACION BINARIA
+# ============================================================================
+
+# Formato estable (sirve como clave de cache entre versiones): un byte de
+# versión, la tabla de términos atómicos (cantidad y nombres UTF-8, en orden
+# de aparición) y las fórmulas en notación prefija, un byte de etiqueta por
+# nodo; los términos atómicos van como índice en la tabla. Los enteros son
+# varint (LEB128). Las etiquetas solo pueden agregarse, nunca cambiar.
+ENCODING_VERSION = 1
+
+_TAG_ATOM = 0
+_NODE_TAGS = {
+    Complement: 1, Privation: 2, Existential: 3, Universal: 4, Particular: 5,
+    Negation: 6, Conjunction: 7, Disjunction: 8, Conditional: 9, Biconditional: 10,
+}
+_TAG_NODES = {tag: cls for cls, tag in _NODE_TAGS.items()}
+_TAG_ARITY = {tag: len(cls._fields) for tag, cls in _TAG_NODES.items()}
+
+
+def _write_varint(out, value):
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos):
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def encode_formulas(formulas):
+    """Codificar una secuencia de fórmulas como bytes (ver decode_formulas)"""
+    table = {}
+    body = bytearray()
+    for formula in formulas:
+        # Recorrido prefijo con pila explícita (sin límite de recursión)
+        stack = [formula]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, AtomicTerm):
+                index = table.get(node.name)
+                if index is None:
+                    index = table[node.name] = len(table)
+                body.append(_TAG_ATOM)
+                _write_varint(body, index)
+            else:
+                body.append(_NODE_TAGS[type(node)])
+                for field in reversed(node._fields):
+                    stack.append(getattr(node, field))
+    
+    out = bytearray([ENCODING_VERSION])
+    _write_varint(out, len(table))
+    for name in table:
+        encoded = name.encode('utf-8')
+        _write_varint(out, len(encoded))
+        out += encoded
+    _write_varint(out, len(formulas))
+    out += body
+    return bytes(out)
+
+
+def decode_formulas(data):
+    """Lista de fórmulas (nodos internados) desde bytes de encode_formulas"""
+    try:
+        if data[0] != ENCODING_VERSION:
+            raise ValueError(f"Unsupported formula encoding version {data[0]}")
+        count, pos = _read_varint(data, 1)
+        names = []
+        for _ in range(count):
+            size, pos = _read_varint(data, pos)
+            names.append(AtomicTerm(bytes(data[pos:pos + size]).decode('utf-8')))
+            pos += size
+        count, pos = _read_varint(data, pos)
+        
+        formulas = []
+        memo = {}
+        end = len(data)
+        for _ in range(count):
+            # Leer la fórmula en prefijo y construirla recorriéndola al revés:
+            # cada nodo encuentra a sus hijos ya construidos en la pila
+            tokens = []
+            pending = 1
+            while pending:
+                if pos >= end:
+                    raise ValueError("Truncated formula encoding")
+                tag = data[pos]
+                pos += 1
+                if tag == _TAG_ATOM:
+                    index, pos = _read_varint(data, pos)
+                    tokens.append(names[index])
+                    pending -= 1
+                else:
+                    tokens.append(tag)
+                    pending += _TAG_ARITY[tag] - 1
+            values = []
+            for token in reversed(tokens):
+                if isinstance(token, AtomicTerm):
+                    values.append(token)
+                    continue
+                if _TAG_ARITY[token] == 1:
+                    key = (token, values.pop())
+                else:
+                    key = (token, values.pop(), values.pop())
+                # Los hijos ya son internados: un nodo repetido sale del memo
+                node = memo.get(key)
+                if node is None:
+                    node = memo[key] = intern_node(_TAG_NODES[token](*key[1:]))
+                values.append(node)
+            formulas.append(values[0])
+    except IndexError:
+        raise ValueError("Truncated formula encoding") from None
+    except KeyError as e:
+        raise ValueError(f"Unknown tag in formula encoding: {e.args[0]}") from None
+    if pos != len(data):
+        raise ValueError("Trailing bytes after formula encoding")
+    return formulas
+
+
+def encode_argument(premises, conclusion):
+    """Codificar un argumento (la conclusión va al final)"""
+    return encode_formulas(list(premises) + [conclusion])
+
+
+def decode_argument(data):
+    """(premisas, conclusión) desde bytes de encode_argument"""
+    formulas = decode_formulas(data)
+    if not formulas:
+        raise ValueError("Encoded argument has no conclusion")
+    return formulas[:-1], formulas[-1]
+
+
 # ============================================================================
 # ESTRUCTURA DEL TABLEAU
 # ============================================================================
 
+NO_DEPS = frozenset()
+
+
 class LabeledFormula:
     """Fórmula etiquetada con un estado: (φ, x)"""
-    def __init__(self, formula, state):
+    __slots__ = ('formula', 'state', 'deps')
+    
+    def __init__(self, formula, state, deps=NO_DEPS):
         self.formula = formula
         self.state = state
+        self.deps = deps        # Índices de las fórmulas iniciales de las que deriva
     
     def __str__(self):
         return f"{self.formula}, {self.state}"
@@ -438,19 +771,145 @@ class Branch:
         self.formulas = []      # Lista de LabeledFormula
         self.relations = []     # Lista de Relation (Q o S)
         self.closed = False
+        self.closed_by = None   # Fórmulas iniciales de las que dependió el cierre
         self.parent = parent    # Rama padre (para heredar información)
+        self.applied = set()    # Instancias de reglas ya aplicadas en esta rama
+        self.index = {}         # Índice de cierre: (formula, state) -> LabeledFormula
+        self._checked = 0       # Fórmulas propias ya revisadas por check_closure
+        # Literales por estado como bitsets: el bit literal_ids[t] de positive[x]
+        # indica (t, x) en la rama y el de negative[x] indica (¬t, x). La tabla
+        # de ids y los diccionarios se heredan copy-on-write: la hija usa los de
+        # la madre, que ya no cambia, hasta su primera escritura (así una
+        # consulta a un prefijo compartido nunca lo modifica). Lo mismo
+        # universals: estado -> fórmulas universales ([A]B y ¬<A>B) en ese
+        # estado (para la restricción)
+        self.literal_ids = parent.literal_ids if parent is not None else {}
+        self.positive = parent.positive if parent is not None else {}
+        self.negative = parent.negative if parent is not None else {}
+        self.universals = parent.universals if parent is not None else {}
+        self._own_ids = parent is None
+        self._own_literals = parent is None
+        self._own_universals = parent is None
+        # Estados intercambiables con los de otra relación Q (no se expanden):
+        # estado -> representante, y el tamaño de la rama al calcularlo
+        self.equivalent = {}
+        self._equivalent_size = None
     
     def add_formula(self, formula, state):
         """Agregar una fórmula etiquetada"""
         lf = LabeledFormula(formula, state)
         self.formulas.append(lf)
+        self.index.setdefault((formula, state), lf)
+        kind = type(formula)
+        if kind is Existential:
+            self.mark_literal(formula.term, state, True)
+        elif kind is Negation:
+            inner = type(formula.formula)
+            if inner is Existential:
+                self.mark_literal(formula.formula.term, state, False)
+            elif inner is Particular:
+                self.add_universal(lf)
+        elif kind is Universal:
+            self.add_universal(lf)
         return lf
     
+    def add_universal(self, lf):
+        """Registrar una fórmula universal ([A]B o ¬<A>B) de la rama en su estado"""
+        if not self._own_universals:
+            self.universals = dict(self.universals)
+            self._own_universals = True
+        self.universals[lf.state] = self.universals.get(lf.state, ()) + (lf,)
+    
+    def mark_literal(self, term, state, positive):
+        """Encender el bit del literal (term, state) o (¬term, state)"""
+        if not self._own_literals:
+            self.positive = dict(self.positive)
+            self.negative = dict(self.negative)
+            self._own_literals = True
+        bit = self.literal_ids.get(term)
+        if bit is None:
+            if not self._own_ids:
+                self.literal_ids = dict(self.literal_ids)
+                self._own_ids = True
+            bit = self.literal_ids[term] = len(self.literal_ids)
+        table = self.positive if positive else self.negative
+        table[state] = table.get(state, 0) | 1 << bit
+    
+    def has_literal(self, term, state, positive=True):
+        """Si (term, state) (o (¬term, state)) está en la rama: un test de bit"""
+        bit = self.literal_ids.get(term)
+        if bit is None:
+            return False
+        table = self.positive if positive else self.negative
+        return table.get(state, 0) >> bit & 1 == 1
+    
+    def literals_within(self, state, other):
+        """Si los literales de 'state' están entre los de 'other' (inclusión de bitsets)"""
+        positive, negative = self.positive, self.negative
+        return (positive.get(state, 0) & ~positive.get(other, 0) == 0 and
+                negative.get(state, 0) & ~negative.get(other, 0) == 0)
+    
+    def literal_clashes(self, state):
+        """Bitset de los literales que aparecen afirmados y negados en 'state'"""
+        return self.positive.get(state, 0) & self.negative.get(state, 0)
+    
+    def find(self, formula, state):
+        """La fórmula etiquetada (formula, state) de la rama, o None"""
+        # Cada rama indexa sólo sus fórmulas propias: se consulta subiendo por
+        # las antecesoras en vez de copiar sus índices en cada nivel
+        key = (formula, state)
+        branch = self
+        while branch is not None:
+            lf = branch.index.get(key)
+            if lf is not None:
+                return lf
+            branch = branch.parent
+        return None
+    
+    def contradiction(self, items):
+        """
+        Primera fórmula de la rama que contradice a alguno de los items
+        ((formula, state) o relaciones), o None si ninguno cierra la rama
+        """
+        for item in items:
+            if not isinstance(item, tuple):
+                continue
+            formula, state = item
+            kind = type(formula)
+            # Literales existenciales: el bitset descarta sin buscar en el índice
+            if kind is Existential:
+                if not self.has_literal(formula.term, state, False):
+                    continue
+                other = self.find(negation_of(formula), state)
+            elif kind is Negation:
+                inner = formula.formula
+                if type(inner) is Existential and not self.has_literal(inner.term, state, True):
+                    continue
+                other = self.find(inner, state)
+            else:
+                other = self.find(negation_of(formula), state)
+            if other is not None:
+                return other
+        return None
+    
     def add_relation(self, relation):
         """Agregar una relación"""
         self.relations.append(relation)
         return relation
     
+    def mark_applied(self, instance):
+        """Registrar que una instancia de regla ya se aplicó en esta rama"""
+        self.applied.add(instance)
+    
+    def was_applied(self, instance):
+        """¿Se aplicó ya la instancia en esta rama o en alguna antecesora?"""
+        branch = self
+        while branch is not None:
+            if instance in branch.applied:
+                return True
+            branch = branch.parent
+        return False
+    
     def get_all_formulas(self):
         """Obtener todas las fórmulas (incluyendo las heredadas del padre)"""
         if self.parent:
@@ -464,22 +923,27 @@ class Branch:
         return self.relations[:]
     
     def check_closure(self):
-        """Verificar si la rama está cerrada (contiene A,x y ¬A,x)"""
-        all_formulas = self.get_all_formulas()
-        
-        for i, lf1 in enumerate(all_formulas):
-            for lf2 in all_formulas[i+1:]:
-                # Mismo estado
-                if lf1.state == lf2.state:
-                    # Una es negación de la otra
-                    if isinstance(lf1.formula, Negation):
-                        if lf1.formula.formula == lf2.formula:
-                            self.closed = True
-                            return True
-                    elif isinstance(lf2.formula, Negation):
-                        if lf2.formula.formula == lf1.formula:
-                            self.closed = True
-                            return True
+        """
+        Verificar si la rama está cerrada (contiene A,x y ¬A,x).
+        Incremental: cada fórmula propia se busca una sola vez en el índice
+        de cierre; las de las antecesoras ya se revisaron en ellas.
+        """
+        if self.closed:
+            return True
+        
+        if self._checked == 0 and self.parent is not None and self.parent.check_closure():
+            self.closed = True
+            self.closed_by = self.parent.closed_by
+            return True
+        
+        while self._checked < len(self.formulas):
+            lf = self.formulas[self._checked]
+            self._checked += 1
+            other = self.contradiction([(lf.formula, lf.state)])
+            if other is not None:
+                self.closed = True
+                self.closed_by = lf.deps | other.deps
+                return True
         
         return False
     
@@ -504,14 +968,32 @@ class Tableau:
         """
         self.root = Branch()
         self.branches = [self.root]  # Lista de ramas abiertas
+        self.initial_formulas = []
+        self.state_deps = {}         # Estado fresco -> dependencias de quien lo creó
+        self.state_parent = {}       # Estado fresco -> estado desde el que se creó
+        self.pruned = []             # Hijas que split_branch no creó: (estado, fórmula que contradicen)
+        self.pruned_deps = set()     # Dependencias de los cierres de esas hijas
+        self.equivalent = {}         # Estado intercambiable -> representante (ver interchangeable_states)
+        
+        # Contadores para ProofStats (siempre activos: cuestan una suma)
+        self.branches_created = 0
+        self.pruned_children = 0
+        self.closure_checks = 0
         
         # Agregar fórmulas iniciales
         for formula, state in initial_formulas:
-            self.root.add_formula(formula, state)
+            self.add_initial(self.root, formula, state)
         
         # Generador de variables frescas
         self.var_counter = 0
     
+    def add_initial(self, branch, formula, state):
+        """Agregar una fórmula inicial; depende solo de sí misma"""
+        lf = branch.add_formula(formula, state)
+        lf.deps = frozenset([len(self.initial_formulas)])
+        self.initial_formulas.append((formula, state))
+        return lf
+    
     def fresh_var(self):
         """Generar una variable fresca para estados"""
         # Ciclo: x, y, z, x1, y1, z1, x2, y2, z2, ...
@@ -528,10 +1010,40 @@ class Tableau:
         """
         Dividir una rama en dos
         left_items, right_items: listas de (formula, state) o relation
+        
+        Antes de crear cada hija se buscan sus items en el índice de cierre
+        de la rama: una hija que cerraría en cuanto se revisa no se crea.
+        Si cierra una sola, la otra se agrega a la rama como extensión
+        lineal; si cierran las dos, la rama queda cerrada.
+        Retorna las hijas creadas (None en lugar de las que no se crearon).
         """
+        closes = []
+        for items in (left_items, right_items):
+            closed = False
+            for item in items:
+                other = branch.contradiction([item])
+                if other is not None:
+                    self.pruned.append((item[1], other))
+                    self.pruned_children += 1
+                    closed = True
+                    break
+            closes.append(closed)
+        
+        if closes[0] and closes[1]:
+            branch.closed = True
+            return None, None
+        if closes[0] or closes[1]:
+            for item in (right_items if closes[0] else left_items):
+                if isinstance(item, tuple):
+                    branch.add_formula(item[0], item[1])
+                else:
+                    branch.add_relation(item)
+            return (None, branch) if closes[0] else (branch, None)
+        
         # Crear dos nuevas ramas hijas
         left_branch = Branch(parent=branch)
         right_branch = Branch(parent=branch)
+        self.branches_created += 2
         
         # Agregar items a cada rama
         for item in left_items:
@@ -553,12 +1065,164 @@ class Tableau:
         
         return left_branch, right_branch
     
+    def fork(self, leaves, initial_formulas):
+        """
+        Nuevo tableau que usa este como prefijo compartido (copy-on-write):
+        cada rama de leaves recibe una rama hija con initial_formulas y solo
+        las hijas se expanden, así que este tableau no se modifica.
+        """
+        child = Tableau([])
+        child.root = self.root
+        child.branches = []
+        child.state_deps = dict(self.state_deps)
+        child.state_parent = dict(self.state_parent)
+        child.pruned_deps = set(self.pruned_deps)
+        child.equivalent = dict(self.equivalent)
+        child.initial_formulas = self.initial_formulas + list(initial_formulas)
+        first = len(self.initial_formulas)
+        for leaf in leaves:
+            branch = Branch(parent=leaf)
+            for index, (formula, state) in enumerate(initial_formulas, first):
+                branch.add_formula(formula, state).deps = frozenset([index])
+            child.branches.append(branch)
+        child.var_counter = self.var_counter
+        return child
+    
+    def record_dependencies(self, source, branch, n_formulas=0, n_relations=0):
+        """
+        Etiquetar lo que una regla acaba de agregar al aplicarse a source
+        (desde las posiciones n_formulas/n_relations de branch, y todo lo de
+        las hijas si la dividió): depende de source y, si está en otro
+        estado, de la fórmula que creó ese estado.
+        """
+        deps = source.deps
+        
+        # Hijas no creadas por split_branch: cerraban con la fórmula 'other'
+        for state, other in self.pruned:
+            closure = deps | other.deps
+            if state != source.state:
+                closure = closure | self.state_deps.get(state, NO_DEPS)
+            self.pruned_deps |= closure
+            if branch.closed and branch.closed_by is None:
+                branch.closed_by = closure
+            elif branch.closed:
+                branch.closed_by = branch.closed_by | closure
+        self.pruned.clear()
+        
+        pieces = [(branch, n_formulas, n_relations)]
+        if branch not in self.branches:
+            pieces += [(b, 0, 0) for b in self.branches if b.parent is branch]
+        
+        for piece, nf, nr in pieces:
+            for rel in piece.relations[nr:]:
+                for state in (rel.y, getattr(rel, 'z', rel.y)):
+                    self.state_deps.setdefault(state, deps)
+                    self.state_parent.setdefault(state, rel.x)
+            for lf in piece.formulas[nf:]:
+                if lf.state == source.state:
+                    lf.deps = deps
+                else:
+                    lf.deps = deps | self.state_deps.get(lf.state, NO_DEPS)
+    
+    def blocked_states(self, formulas):
+        """
+        Estados bloqueados de una rama (formulas: todas las de la rama).
+        Un estado está bloqueado si sus fórmulas son un subconjunto de las de
+        un antecesor (lo que se expandiría en él ya se expande en el
+        antecesor) o si lo está alguno de sus antecesores.
+        """
+        labels = {}
+        for lf in formulas:
+            labels.setdefault(lf.state, set()).add(lf.formula)
+        
+        blocked = set()
+        for state, label in labels.items():
+            ancestor = self.state_parent.get(state)
+            while ancestor is not None:
+                if label <= labels.get(ancestor, NO_DEPS):
+                    blocked.add(state)
+                    break
+                ancestor = self.state_parent.get(ancestor)
+        
+        # Bloqueo indirecto: los descendientes de un estado bloqueado
+        for state in labels:
+            ancestor = self.state_parent.get(state)
+            while ancestor is not None and state not in blocked:
+                if ancestor in blocked:
+                    blocked.add(state)
+                ancestor = self.state_parent.get(ancestor)
+        
+        return blocked
+    
+    def interchangeable_states(self, branch):
+        """
+        Reducción por simetría. Una relación Qxyz cuyos estados y, z son hojas
+        (no tienen relaciones propias) es intercambiable con una Qxy'z'
+        anterior no intercambiable si los literales de y y de z están entre
+        los de y' y z': todo lo que se expandiría en ella se expande igual en
+        la representante, y como sus estados no se expanden ni reciben
+        instancias nuevas, la inclusión se mantiene. Los estados frescos solo
+        reciben literales existenciales, así que la inclusión se decide con
+        los bitsets de la rama.
+        
+        Retorna {estado: representante} y lo registra en self.equivalent; sus
+        estados se bloquean y las reglas por relación y la restricción
+        existencial la saltean. Se guarda en branch.equivalent y solo se
+        recalcula si la rama creció desde entonces.
+        """
+        size = (len(branch.formulas), len(branch.relations))
+        if branch._equivalent_size == size:
+            return branch.equivalent
+        branch._equivalent_size = size
+        
+        by_origin = {}
+        sources = set()
+        for rel in branch.get_all_relations():
+            sources.add(rel.x)
+            if isinstance(rel, RelationQ):
+                by_origin.setdefault(rel.x, []).append(rel)
+        
+        equivalent = {}
+        for rels in by_origin.values():
+            representatives = []
+            for rel in rels:
+                if rel.y in sources or rel.z in sources:
+                    representatives.append(rel)
+                    continue
+                for other in representatives:
+                    if (branch.literals_within(rel.y, other.y) and
+                            branch.literals_within(rel.z, other.z)):
+                        equivalent[rel.y] = other.y
+                        equivalent[rel.z] = other.z
+                        break
+                else:
+                    representatives.append(rel)
+        
+        for state, representative in equivalent.items():
+            self.equivalent.setdefault(state, representative)
+        branch.equivalent = equivalent
+        return equivalent
+    
+    def closure_dependencies(self):
+        """Índices de las fórmulas iniciales usadas por los cierres de todas las ramas"""
+        deps = set(self.pruned_deps)
+        for branch in self.branches:
+            if branch.closed_by:
+                deps |= branch.closed_by
+        return deps
+    
+    def count_open(self):
+        """Número de ramas no cerradas"""
+        return sum(1 for branch in self.branches if not branch.closed)
+    
     def is_closed(self):
         """Verificar si el tableau está cerrado (todas las ramas cerradas)"""
-        for branch in self.branches:
+        for checked, branch in enumerate(self.branches, 1):
             branch.check_closure()
             if not branch.closed:
+                self.closure_checks += checked
                 return False
+        self.closure_checks += len(self.branches)
         return True
     
     def __str__(self):
@@ -660,6 +1324,45 @@ if __name__ == "__main__":
 class Rule:
     """Clase base para reglas de tableau"""
     
+    # Las reglas que usan una relación existente (Qxyz o Sxy) se aplican una
+    # vez por relación y registran ellas mismas sus instancias
+    per_relation = False
+    
+    # Las reglas que dividen la rama exponen sus dos hijas con split_items
+    branching = False
+    
+    def instance(self, labeled_formula, relation=None):
+        """Clave de una aplicación de la regla, para no repetirla en una rama"""
+        return (self.__class__, labeled_formula.formula, labeled_formula.state, relation)
+    
+    def next_relation(self, labeled_formula, branch, kind=RelationQ):
+        """
+        Primera relación de tipo kind desde el estado de la fórmula aún no
+        usada por la regla (salvo las intercambiables con otra: Branch.equivalent)
+        """
+        state = labeled_formula.state
+        equivalent = branch.equivalent
+        for rel in branch.get_all_relations():
+            if (isinstance(rel, kind) and rel.x == state and rel.y not in equivalent and
+                    not branch.was_applied(self.instance(labeled_formula, rel))):
+                return rel
+        return None
+    
+    def matches(self, formula):
+        """
+        Chequeo solo sintáctico (sin mirar la rama), para filtrar candidatas.
+        Las reglas que no usan relaciones deciden solo por la forma de la
+        fórmula; las que sí, lo redefinen con su parte sintáctica.
+        """
+        return self.applies_to(LabeledFormula(formula, None), None)
+    
+    def split_items(self, labeled_formula, branch):
+        """
+        Para reglas que ramifican: (left_items, right_items) de la próxima
+        aplicación, sin modificar nada (ver Tableau.split_branch)
+        """
+        return None
+    
     def applies_to(self, labeled_formula, branch):
         """
         Verificar si la regla aplica a una fórmula etiquetada en una rama
@@ -689,44 +1392,38 @@ class UniversalAffirmativeRule(Rule):
     Ramifica: ¬A, y | B, z
     """
     
-    def applies_to(self, labeled_formula, branch):
-        formula = labeled_formula.formula
+    per_relation = True
+    branching = True
+    
+    def matches(self, formula):
         # Debe ser una Universal
-        if not isinstance(formula, Universal):
-            return False
-        
+        return isinstance(formula, Universal)
+    
+    def applies_to(self, labeled_formula, branch):
         # Debe existir alguna relación Qxyz donde x = estado de la fórmula
-        state = labeled_formula.state
-        relations = branch.get_all_relations()
-        
-        for rel in relations:
-            if isinstance(rel, RelationQ) and rel.x == state:
-                return True
-        
-        return False
+        return (self.matches(labeled_formula.formula) and
+                self.next_relation(labeled_formula, branch) is not None)
     
-    def apply(self, labeled_formula, branch, tableau):
+    def split_items(self, labeled_formula, branch):
         formula = labeled_formula.formula
-        state = labeled_formula.state
+        rel = self.next_relation(labeled_formula, branch)
+        if rel is None:
+            return None
         
-        # Buscar todas las relaciones Qxyz con x = state
-        relations = branch.get_all_relations()
-        applied = False
-        
-        for rel in relations:
-            if isinstance(rel, RelationQ) and rel.x == state:
-                # Ramificar: ¬A, y | B, z
-                subject = formula.subject
-                predicate = formula.predicate
-                
-                left_items = [(Negation(Existential(subject)), rel.y)]
-                right_items = [(Existential(predicate), rel.z)]
-                
-                tableau.split_branch(branch, left_items, right_items)
-                applied = True
-                break  # Solo aplicamos una vez por ahora
+        # Ramificar: ¬A, y | B, z
+        left_items = [(negation_of(existential_of(formula.subject)), rel.y)]
+        right_items = [(existential_of(formula.predicate), rel.z)]
+        return left_items, right_items
+    
+    def apply(self, labeled_formula, branch, tableau):
+        # Una relación por aplicación
+        rel = self.next_relation(labeled_formula, branch)
+        if rel is None:
+            return False
         
-        return applied
+        tableau.split_branch(branch, *self.split_items(labeled_formula, branch))
+        branch.mark_applied(self.instance(labeled_formula, rel))
+        return True
 
 
 class UniversalNegativeRule(Rule):
@@ -736,46 +1433,38 @@ class UniversalNegativeRule(Rule):
     Ramifica: ¬A, y | ¬B, z
     """
     
-    def applies_to(self, labeled_formula, branch):
-        formula = labeled_formula.formula
-        
+    per_relation = True
+    branching = True
+    
+    def matches(self, formula):
         # Debe ser negación de Particular
-        if not isinstance(formula, Negation):
-            return False
-        if not isinstance(formula.formula, Particular):
-            return False
-        
+        return isinstance(formula, Negation) and isinstance(formula.formula, Particular)
+    
+    def applies_to(self, labeled_formula, branch):
         # Debe existir Qxyz con x = estado
-        state = labeled_formula.state
-        relations = branch.get_all_relations()
-        
-        for rel in relations:
-            if isinstance(rel, RelationQ) and rel.x == state:
-                return True
-        
-        return False
+        return (self.matches(labeled_formula.formula) and
+                self.next_relation(labeled_formula, branch) is not None)
     
-    def apply(self, labeled_formula, branch, tableau):
+    def split_items(self, labeled_formula, branch):
         neg_particular = labeled_formula.formula.formula  # La Particular dentro de la Negation
-        state = labeled_formula.state
-        
-        relations = branch.get_all_relations()
-        applied = False
+        rel = self.next_relation(labeled_formula, branch)
+        if rel is None:
+            return None
         
-        for rel in relations:
-            if isinstance(rel, RelationQ) and rel.x == state:
-                # Ramificar: ¬A, y | ¬B, z
-                subject = neg_particular.subject
-                predicate = neg_particular.predicate
-                
-                left_items = [(Negation(Existential(subject)), rel.y)]
-                right_items = [(Negation(Existential(predicate)), rel.z)]
-                
-                tableau.split_branch(branch, left_items, right_items)
-                applied = True
-                break
+        # Ramificar: ¬A, y | ¬B, z
+        left_items = [(negation_of(existential_of(neg_particular.subject)), rel.y)]
+        right_items = [(negation_of(existential_of(neg_particular.predicate)), rel.z)]
+        return left_items, right_items
+    
+    def apply(self, labeled_formula, branch, tableau):
+        # Una relación por aplicación
+        rel = self.next_relation(labeled_formula, branch)
+        if rel is None:
+            return False
         
-        return applied
+        tableau.split_branch(branch, *self.split_items(labeled_formula, branch))
+        branch.mark_applied(self.instance(labeled_formula, rel))
+        return True
 
 
 class ParticularAffirmativeRule(Rule):
@@ -805,8 +1494,8 @@ class ParticularAffirmativeRule(Rule):
         subject = formula.subject
         predicate = formula.predicate
         
-        branch.add_formula(Existential(subject), y)
-        branch.add_formula(Existential(predicate), z)
+        branch.add_formula(existential_of(subject), y)
+        branch.add_formula(existential_of(predicate), z)
         
         return True
 
@@ -842,8 +1531,8 @@ class ParticularNegativeRule(Rule):
         subject = universal.subject
         predicate = universal.predicate
         
-        branch.add_formula(Existential(subject), y)
-        branch.add_formula(Negation(Existential(predicate)), z)
+        branch.add_formula(existential_of(subject), y)
+        branch.add_formula(negation_of(existential_of(predicate)), z)
         
         return True
 
@@ -859,24 +1548,16 @@ class ComplementAffirmativeRule(Rule):
     Agrega: ¬A, y
     """
     
-    def applies_to(self, labeled_formula, branch):
-        formula = labeled_formula.formula
-        
+    per_relation = True
+    
+    def matches(self, formula):
         # Debe ser existencial de un complemento
-        if not isinstance(formula, Existential):
-            return False
-        if not isinstance(formula.term, Complement):
-            return False
-        
+        return isinstance(formula, Existential) and isinstance(formula.term, Complement)
+    
+    def applies_to(self, labeled_formula, branch):
         # Debe existir Sxy con x = estado
-        state = labeled_formula.state
-        relations = branch.get_all_relations()
-        
-        for rel in relations:
-            if isinstance(rel, RelationS) and rel.x == state:
-                return True
-        
-        return False
+        return (self.matches(labeled_formula.formula) and
+                self.next_relation(labeled_formula, branch, RelationS) is not None)
     
     def apply(self, labeled_formula, branch, tableau):
         complement_term = labeled_formula.formula.term
@@ -887,9 +1568,11 @@ class ComplementAffirmativeRule(Rule):
         applied = False
         
         for rel in relations:
-            if isinstance(rel, RelationS) and rel.x == state:
+            if (isinstance(rel, RelationS) and rel.x == state and
+                    not branch.was_applied(self.instance(labeled_formula, rel))):
                 # Agregar ¬A, y
-                branch.add_formula(Negation(Existential(inner_term)), rel.y)
+                branch.add_formula(negation_of(existential_of(inner_term)), rel.y)
+                branch.mark_applied(self.instance(labeled_formula, rel))
                 applied = True
                 break
         
@@ -929,7 +1612,7 @@ class ComplementNegativeRule(Rule):
         branch.add_relation(new_s)
         
         # Agregar A, y
-        branch.add_formula(Existential(inner_term), y)
+        branch.add_formula(existential_of(inner_term), y)
         
         return True
 
@@ -941,24 +1624,16 @@ class PrivationAffirmativeRule(Rule):
     Agrega: ¬A, y
     """
     
-    def applies_to(self, labeled_formula, branch):
-        formula = labeled_formula.formula
-        
+    per_relation = True
+    
+    def matches(self, formula):
         # Debe ser existencial de una privación
-        if not isinstance(formula, Existential):
-            return False
-        if not isinstance(formula.term, Privation):
-            return False
-        
+        return isinstance(formula, Existential) and isinstance(formula.term, Privation)
+    
+    def applies_to(self, labeled_formula, branch):
         # Debe existir Sxy con x = estado
-        state = labeled_formula.state
-        relations = branch.get_all_relations()
-        
-        for rel in relations:
-            if isinstance(rel, RelationS) and rel.x == state:
-                return True
-        
-        return False
+        return (self.matches(labeled_formula.formula) and
+                self.next_relation(labeled_formula, branch, RelationS) is not None)
     
     def apply(self, labeled_formula, branch, tableau):
         privation_term = labeled_formula.formula.term
@@ -969,9 +1644,11 @@ class PrivationAffirmativeRule(Rule):
         applied = False
         
         for rel in relations:
-            if isinstance(rel, RelationS) and rel.x == state:
+            if (isinstance(rel, RelationS) and rel.x == state and
+                    not branch.was_applied(self.instance(labeled_formula, rel))):
                 # Agregar ¬A, y
-                branch.add_formula(Negation(Existential(inner_term)), rel.y)
+                branch.add_formula(negation_of(existential_of(inner_term)), rel.y)
+                branch.mark_applied(self.instance(labeled_formula, rel))
                 applied = True
                 break
         
@@ -1011,7 +1688,7 @@ class PrivationNegativeRule(Rule):
         branch.add_relation(new_s)
         
         # Agregar A, y
-        branch.add_formula(Existential(inner_term), y)
+        branch.add_formula(existential_of(inner_term), y)
         
         return True
 
@@ -1064,10 +1741,12 @@ class DisjunctionRule(Rule):
     Ramifica: φ, x | ψ, x
     """
     
+    branching = True
+    
     def applies_to(self, labeled_formula, branch):
         return isinstance(labeled_formula.formula, Disjunction)
     
-    def apply(self, labeled_formula, branch, tableau):
+    def split_items(self, labeled_formula, branch):
         formula = labeled_formula.formula
         state = labeled_formula.state
         
@@ -1075,8 +1754,10 @@ class DisjunctionRule(Rule):
         left_items = [(formula.left, state)]
         right_items = [(formula.right, state)]
         
-        tableau.split_branch(branch, left_items, right_items)
-        
+        return left_items, right_items
+    
+    def apply(self, labeled_formula, branch, tableau):
+        tableau.split_branch(branch, *self.split_items(labeled_formula, branch))
         return True
 
 
@@ -1086,19 +1767,23 @@ class ConditionalRule(Rule):
     Ramifica: ¬φ, x | ψ, x
     """
     
+    branching = True
+    
     def applies_to(self, labeled_formula, branch):
         return isinstance(labeled_formula.formula, Conditional)
     
-    def apply(self, labeled_formula, branch, tableau):
+    def split_items(self, labeled_formula, branch):
         formula = labeled_formula.formula
         state = labeled_formula.state
         
         # Ramificar
-        left_items = [(Negation(formula.antecedent), state)]
+        left_items = [(negation_of(formula.antecedent), state)]
         right_items = [(formula.consequent, state)]
         
-        tableau.split_branch(branch, left_items, right_items)
-        
+        return left_items, right_items
+    
+    def apply(self, labeled_formula, branch, tableau):
+        tableau.split_branch(branch, *self.split_items(labeled_formula, branch))
         return True
 
 
@@ -1108,10 +1793,12 @@ class BiconditionalRule(Rule):
     Ramifica: (φ, x y ψ, x) | (¬φ, x y ¬ψ, x)
     """
     
+    branching = True
+    
     def applies_to(self, labeled_formula, branch):
         return isinstance(labeled_formula.formula, Biconditional)
     
-    def apply(self, labeled_formula, branch, tableau):
+    def split_items(self, labeled_formula, branch):
         formula = labeled_formula.formula
         state = labeled_formula.state
         
@@ -1121,12 +1808,14 @@ class BiconditionalRule(Rule):
             (formula.right, state)
         ]
         right_items = [
-            (Negation(formula.left), state),
-            (Negation(formula.right), state)
+            (negation_of(formula.left), state),
+            (negation_of(formula.right), state)
         ]
         
-        tableau.split_branch(branch, left_items, right_items)
-        
+        return left_items, right_items
+    
+    def apply(self, labeled_formula, branch, tableau):
+        tableau.split_branch(branch, *self.split_items(labeled_formula, branch))
         return True
 
 
@@ -1160,6 +1849,8 @@ class NegatedConjunctionRule(Rule):
     Ramifica: ¬φ, x | ¬ψ, x
     """
     
+    branching = True
+    
     def applies_to(self, labeled_formula, branch):
         formula = labeled_formula.formula
         
@@ -1167,16 +1858,18 @@ class NegatedConjunctionRule(Rule):
             return False
         return isinstance(formula.formula, Conjunction)
     
-    def apply(self, labeled_formula, branch, tableau):
+    def split_items(self, labeled_formula, branch):
         conjunction = labeled_formula.formula.formula
         state = labeled_formula.state
         
         # Ramificar
-        left_items = [(Negation(conjunction.left), state)]
-        right_items = [(Negation(conjunction.right), state)]
-        
-        tableau.split_branch(branch, left_items, right_items)
+        left_items = [(negation_of(conjunction.left), state)]
+        right_items = [(negation_of(conjunction.right), state)]
         
+        return left_items, right_items
+    
+    def apply(self, labeled_formula, branch, tableau):
+        tableau.split_branch(branch, *self.split_items(labeled_formula, branch))
         return True
 
 
@@ -1198,8 +1891,8 @@ class NegatedDisjunctionRule(Rule):
         state = labeled_formula.state
         
         # Agregar ambas negaciones al tronco
-        branch.add_formula(Negation(disjunction.left), state)
-        branch.add_formula(Negation(disjunction.right), state)
+        branch.add_formula(negation_of(disjunction.left), state)
+        branch.add_formula(negation_of(disjunction.right), state)
         
         return True
 
@@ -1223,7 +1916,7 @@ class NegatedConditionalRule(Rule):
         
         # Agregar ambas al tronco
         branch.add_formula(conditional.antecedent, state)
-        branch.add_formula(Negation(conditional.consequent), state)
+        branch.add_formula(negation_of(conditional.consequent), state)
         
         return True
 
@@ -1234,6 +1927,8 @@ class NegatedBiconditionalRule(Rule):
     Ramifica: (φ, x y ¬ψ, x) | (¬φ, x y ψ, x)
     """
     
+    branching = True
+    
     def applies_to(self, labeled_formula, branch):
         formula = labeled_formula.formula
         
@@ -1241,22 +1936,24 @@ class NegatedBiconditionalRule(Rule):
             return False
         return isinstance(formula.formula, Biconditional)
     
-    def apply(self, labeled_formula, branch, tableau):
+    def split_items(self, labeled_formula, branch):
         biconditional = labeled_formula.formula.formula
         state = labeled_formula.state
         
         # Ramificar
         left_items = [
             (biconditional.left, state),
-            (Negation(biconditional.right), state)
+            (negation_of(biconditional.right), state)
         ]
         right_items = [
-            (Negation(biconditional.left), state),
+            (negation_of(biconditional.left), state),
             (biconditional.right, state)
         ]
         
-        tableau.split_branch(branch, left_items, right_items)
-        
+        return left_items, right_items
+    
+    def apply(self, labeled_formula, branch, tableau):
+        tableau.split_branch(branch, *self.split_items(labeled_formula, branch))
         return True
 
 
@@ -1289,6 +1986,539 @@ ALL_RULES = [
 ]
 
 
+# ============================================================================
+# SIMPLIFICACION DE PREMISAS
+# ============================================================================
+
+_COMMUTATIVE = (Conjunction, Disjunction, Biconditional)
+
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def canonical(formula):
+    """
+    Forma canónica para comparar premisas: sin dobles negaciones y con los
+    operandos de ∧, ∨ y ↔ en orden fijo. Solo se usa como clave; las
+    premisas que se prueban son las originales.
+    """
+    # Recorrido en postorden con una pila explícita (como el parser): una
+    # premisa muy anidada no agota la recursión
+    done = {}
+    pending = [(formula, False)]
+    while pending:
+        f, ready = pending.pop()
+        if f in done:
+            continue
+        if isinstance(f, Negation):
+            children = (f.formula,)
+        elif isinstance(f, _COMMUTATIVE):
+            children = (f.left, f.right)
+        elif isinstance(f, Conditional):
+            children = (f.antecedent, f.consequent)
+        else:
+            done[f] = f
+            continue
+        if not ready:
+            pending.append((f, True))
+            pending.extend((child, False) for child in children if child not in done)
+            continue
+        if isinstance(f, Negation):
+            inner = done[f.formula]
+            done[f] = inner.formula if isinstance(inner, Negation) else intern_node(Negation(inner))
+        elif isinstance(f, _COMMUTATIVE):
+            # El orden solo tiene que ser fijo dentro del proceso (la forma
+            # canónica no se guarda): el hash, ya calculado, evita recorrer
+            # los operandos como lo haría str
+            left, right = sorted((done[f.left], done[f.right]), key=hash)
+            done[f] = intern_node(type(f)(left, right))
+        else:
+            done[f] = intern_node(Conditional(done[f.antecedent], done[f.consequent]))
+    return done[formula]
+
+
+def _operands(formula, kind):
+    """Conjuntos de operandos de una cadena de ∧ (o de ∨), aplanada"""
+    operands = set()
+    pending = [formula]
+    while pending:
+        f = pending.pop()
+        if isinstance(f, kind):
+            pending.extend((f.left, f.right))
+        else:
+            operands.add(f)
+    return operands
+
+
+def reduce_premises(premises):
+    """
+    Quitar premisas duplicadas (tras canonizar) y premisas implicadas
+    sintácticamente por otra: un conyunto de otra premisa, o una disyunción
+    con un disyunto que otra premisa afirma.
+    Retorna (conservadas, descartadas); cada descartada es un par
+    (premisa, premisa conservada que la implica).
+    """
+    kept = []
+    dropped = []
+    seen = {}
+    for premise in premises:
+        key = canonical(premise)
+        if key in seen:
+            dropped.append((premise, seen[key]))
+        else:
+            seen[key] = premise
+            kept.append(premise)
+    
+    keys = [canonical(p) for p in kept]
+    conjuncts = [_operands(k, Conjunction) for k in keys]
+    disjuncts = [_operands(k, Disjunction) for k in keys]
+    removed = [False] * len(kept)
+    for i in range(len(kept)):
+        for j in range(len(kept)):
+            if i == j or removed[j]:
+                continue
+            if keys[i] in conjuncts[j] or not disjuncts[i].isdisjoint(conjuncts[j]):
+                removed[i] = True
+                dropped.append((kept[i], kept[j]))
+                break
+    
+    return [p for p, r in zip(kept, removed) if not r], dropped
+
+
+# ============================================================================
+# POLITICAS DE PLANIFICACION
+# ============================================================================
+
+class SchedulingPolicy:
+    """
+    Decide qué aplicación de regla se hace primero en una rama: la candidata
+    de menor prioridad. Una candidata con prioridad 'best' se aplica sin
+    seguir buscando. La política base toma la primera que encuentra.
+    """
+    
+    best = (0,)
+    
+    def priority(self, rule, labeled_formula, branch):
+        return self.best
+
+
+class RuleOrderPolicy(SchedulingPolicy):
+    """Orden original: primera fórmula de la rama y primera regla de la lista"""
+    pass
+
+
+class HeuristicPolicy(SchedulingPolicy):
+    """
+    Reglas lineales (sin ramificar) siempre primero, en cualquier lugar de
+    la rama; entre las que ramifican, la que deja menos hijas abiertas
+    (una hija que contradice la rama cierra en cuanto se revisa).
+    """
+    
+    def priority(self, rule, labeled_formula, branch):
+        if not rule.branching:
+            return self.best
+        children = rule.split_items(labeled_formula, branch)
+        open_children = sum(1 for items in children if branch.contradiction(items) is None)
+        return (1, open_children)
+
+
+# ============================================================================
+# ESTADISTICAS
+# ============================================================================
+
+class ProofStats:
+    """
+    Estadisticas de una prueba. Con TableauProver(collect_stats=True) cada
+    prueba (prove, prove_argument, KnowledgeBase.query...) deja una nueva en
+    prover.stats; sin la opcion prover.stats es None y no se mide nada.
+    prove_with_stats y prove_argument_with_stats las retornan con el resultado.
+    """
+    
+    def __init__(self, tableau):
+        self.rule_counts = {}       # Clase de regla -> aplicaciones exitosas
+        self.rule_attempts = {}     # Clase de regla -> llamadas a apply (tambien fallidas)
+        self.rule_time = {}         # Clase de regla -> segundos acumulados en apply
+        self.iterations = 0
+        self.closure_checks = 0
+        self.branches_created = 0
+        self.branches_closed = 0
+        self.pruned_children = 0    # Hijas que split_branch no creó porque cerraban
+        self.peak_open = tableau.count_open()
+        self.fresh_vars = 0
+        self.restriction_passes = 0
+        self.restriction_added = 0
+        self.symmetric_states = 0   # Estados no expandidos por intercambiables (simetría)
+        self.elapsed = 0.0          # Segundos de trabajo (sin las pausas entre pasos)
+        self.result = None
+        self._start = (tableau.var_counter, tableau.branches_created,
+                       tableau.pruned_children, tableau.closure_checks, len(tableau.equivalent))
+    
+    def record_rule(self, rule, seconds, success=True):
+        name = type(rule).__name__
+        self.rule_attempts[name] = self.rule_attempts.get(name, 0) + 1
+        self.rule_time[name] = self.rule_time.get(name, 0.0) + seconds
+        if success:
+            self.rule_counts[name] = self.rule_counts.get(name, 0) + 1
+    
+    def track(self, steps, tableau):
+        """Consumir los pasos de expand_steps midiendo el tiempo de trabajo"""
+        start = time.perf_counter()
+        try:
+            while True:
+                try:
+                    step = next(steps)
+                except StopIteration as stop:
+                    self.result = stop.value
+                    return stop.value
+                finally:
+                    self.elapsed += time.perf_counter() - start
+                self.peak_open = max(self.peak_open, step[1])
+                yield step
+                start = time.perf_counter()
+        finally:
+            self.collect(tableau)
+    
+    def collect(self, tableau):
+        """Tomar los contadores del tableau (diferencias desde el comienzo)"""
+        variables, created, pruned, checks, symmetric = self._start
+        self.fresh_vars = tableau.var_counter - variables
+        self.branches_created = tableau.branches_created - created
+        self.pruned_children = tableau.pruned_children - pruned
+        self.closure_checks += tableau.closure_checks - checks
+        self.symmetric_states = len(tableau.equivalent) - symmetric
+        self.branches_closed = sum(1 for branch in tableau.branches if branch.closed)
+    
+    def as_dict(self):
+        """Diccionario serializable (JSON)"""
+        return {
+            "result": self.result,
+            "iterations": self.iterations,
+            "elapsed_ms": round(self.elapsed * 1000.0, 3),
+            "rules": {name: {"count": self.rule_counts.get(name, 0), "attempts": attempts,
+                             "ms": round(self.rule_time[name] * 1000.0, 3)}
+                      for name, attempts in self.rule_attempts.items()},
+            "closure_checks": self.closure_checks,
+            "branches_created": self.branches_created,
+            "branches_closed": self.branches_closed,
+            "pruned_children": self.pruned_children,
+            "peak_open": self.peak_open,
+            "fresh_vars": self.fresh_vars,
+            "restriction_passes": self.restriction_passes,
+            "restriction_added": self.restriction_added,
+            "symmetric_states": self.symmetric_states,
+        }
+    
+    def __str__(self):
+        lines = [f"Resultado: {self.result}  Iteraciones: {self.iterations}  "
+                 f"Tiempo: {self.elapsed * 1000.0:.2f} ms"]
+        for name, attempts in sorted(self.rule_attempts.items(), key=lambda item: -self.rule_time[item[0]]):
+            failed = attempts - self.rule_counts.get(name, 0)
+            lines.append(f"  {name:<28}{self.rule_counts.get(name, 0):>6}{self.rule_time[name] * 1000.0:>10.3f} ms"
+                         + (f"  ({failed} fallidas)" if failed else ""))
+        lines.append(f"Cierres revisados: {self.closure_checks}  Ramas creadas: {self.branches_created}  "
+                     f"cerradas: {self.branches_closed}  podadas: {self.pruned_children}  "
+                     f"pico abiertas: {self.peak_open}")
+        lines.append(f"Variables frescas: {self.fresh_vars}  Restriccion existencial: "
+                     f"{self.restriction_passes} pasadas, {self.restriction_added} agregadas  "
+                     f"Estados intercambiables: {self.symmetric_states}")
+        return "\n".join(lines)
+
+
+# ============================================================================
+# GANCHOS DE PERFILADO
+# ============================================================================
+
+class ProofHooks:
+    """
+    Ganchos de perfilado: TableauProver(hooks=...) los llama durante cada
+    prueba. Los tiempos son segundos (perf_counter). Sin ganchos el
+    probador no mide nada y el tableau no se envuelve.
+    
+    Las divisiones y los cierres se observan envolviendo split_branch e
+    is_closed en la instancia del tableau mientras dura la prueba.
+    """
+    
+    def proof_started(self, tableau):
+        pass
+    
+    def proof_finished(self, tableau, result):
+        """result es None si la prueba se abandonó"""
+        pass
+    
+    def before_rule(self, rule, labeled_formula, branch):
+        pass
+    
+    def after_rule(self, rule, labeled_formula, branch, seconds, added):
+        """added: fórmulas y relaciones que la regla agregó a la rama"""
+        pass
+    
+    def on_split(self, branch, children, seconds):
+        """children: (izquierda, derecha), None en lugar de las hijas podadas"""
+        pass
+    
+    def on_closure(self, branch, seconds):
+        pass
+    
+    def on_restriction(self, branch, seconds):
+        """branch: la rama que recibió una fórmula, o None si no se agregó nada"""
+        pass
+    
+    def track(self, steps, tableau):
+        """Consumir los pasos de expand_steps con el tableau instrumentado"""
+        split_branch = tableau.split_branch
+        is_closed = tableau.is_closed
+        
+        def traced_split(branch, left_items, right_items):
+            start = time.perf_counter()
+            children = split_branch(branch, left_items, right_items)
+            seconds = time.perf_counter() - start
+            self.on_split(branch, children, seconds)
+            if branch.closed:
+                self.on_closure(branch, seconds)
+            return children
+        
+        def traced_is_closed():
+            open_before = [b for b in tableau.branches if not b.closed]
+            start = time.perf_counter()
+            closed = is_closed()
+            seconds = time.perf_counter() - start
+            for branch in open_before:
+                if branch.closed:
+                    self.on_closure(branch, seconds)
+            return closed
+        
+        tableau.split_branch = traced_split
+        tableau.is_closed = traced_is_closed
+        result = None
+        self.proof_started(tableau)
+        try:
+            result = yield from steps
+            return result
+        finally:
+            del tableau.split_branch, tableau.is_closed
+            self.proof_finished(tableau, result)
+
+
+class HookChain(ProofHooks):
+    """Varios ganchos a la vez, llamados en orden"""
+    
+    def __init__(self, hooks):
+        self.hooks = list(hooks)
+    
+    def proof_started(self, tableau):
+        for hook in self.hooks:
+            hook.proof_started(tableau)
+    
+    def proof_finished(self, tableau, result):
+        for hook in self.hooks:
+            hook.proof_finished(tableau, result)
+    
+    def before_rule(self, rule, labeled_formula, branch):
+        for hook in self.hooks:
+            hook.before_rule(rule, labeled_formula, branch)
+    
+    def after_rule(self, rule, labeled_formula, branch, seconds, added):
+        for hook in self.hooks:
+            hook.after_rule(rule, labeled_formula, branch, seconds, added)
+    
+    def on_split(self, branch, children, seconds):
+        for hook in self.hooks:
+            hook.on_split(branch, children, seconds)
+    
+    def on_closure(self, branch, seconds):
+        for hook in self.hooks:
+            hook.on_closure(branch, seconds)
+    
+    def on_restriction(self, branch, seconds):
+        for hook in self.hooks:
+            hook.on_restriction(branch, seconds)
+
+
+class AggregateProfile(ProofHooks):
+    """
+    Perfil agregado al estilo de cProfile/pstats, acumulado entre pruebas:
+    por clase de regla, split_branch, closure y existential_restriction,
+    llamadas, tiempo propio (tottime), acumulado (cumtime) y máximo.
+    El tiempo propio de una regla descuenta las divisiones que hizo.
+    """
+    
+    def __init__(self):
+        self.entries = {}   # Nombre -> [llamadas, tottime, cumtime, máximo]
+        self._nested = 0.0
+    
+    def add(self, name, tottime, cumtime):
+        entry = self.entries.get(name)
+        if entry is None:
+            entry = self.entries[name] = [0, 0.0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += tottime
+        entry[2] += cumtime
+        entry[3] = max(entry[3], cumtime)
+    
+    def before_rule(self, rule, labeled_formula, branch):
+        self._nested = 0.0
+    
+    def after_rule(self, rule, labeled_formula, branch, seconds, added):
+        self.add(type(rule).__name__, seconds - self._nested, seconds)
+    
+    def on_split(self, branch, children, seconds):
+        self._nested += seconds
+        self.add("split_branch", seconds, seconds)
+    
+    def on_closure(self, branch, seconds):
+        self.add("closure", seconds, seconds)
+    
+    def on_restriction(self, branch, seconds):
+        self.add("existential_restriction", seconds, seconds)
+    
+    def print_stats(self, sort="tottime", stream=None):
+        """Tabla ordenada por 'ncalls', 'tottime', 'cumtime' o 'maxtime'"""
+        column = {"ncalls": 0, "tottime": 1, "cumtime": 2, "maxtime": 3}[sort]
+        print(f"{'ncalls':>9}{'tottime':>10}{'percall':>10}{'cumtime':>10}{'maxtime':>10}  nombre",
+              file=stream)
+        for name, entry in sorted(self.entries.items(), key=lambda item: -item[1][column]):
+            calls, tottime, cumtime, maxtime = entry
+            print(f"{calls:>9}{tottime:>10.4f}{tottime / calls:>10.6f}{cumtime:>10.4f}"
+                  f"{maxtime:>10.6f}  {name}", file=stream)
+
+
+class MemorySnapshots(ProofHooks):
+    """
+    Instantánea de tracemalloc cada 'every' aplicaciones de reglas (contadas
+    entre pruebas). Inicia tracemalloc durante la prueba si no estaba activo.
+    Guarda la primera instantánea y las 'keep' más recientes como
+    (paso, bytes actuales, pico, snapshot).
+    """
+    
+    def __init__(self, every=100, keep=10):
+        self.every = every
+        self.keep = keep
+        self.steps = 0
+        self.first = None
+        self.snapshots = []
+        self._started = False
+    
+    def proof_started(self, tableau):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started = True
+    
+    def proof_finished(self, tableau, result):
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+    
+    def after_rule(self, rule, labeled_formula, branch, seconds, added):
+        self.steps += 1
+        if self.steps % self.every:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        entry = (self.steps, current, peak, tracemalloc.take_snapshot())
+        if self.first is None:
+            self.first = entry
+        else:
+            self.snapshots = self.snapshots[-(self.keep - 1):] + [entry] if self.keep > 1 else [entry]
+    
+    def report(self, limit=10, stream=None):
+        """Memoria por instantánea y las líneas que más crecieron desde la primera"""
+        entries = ([self.first] if self.first else []) + self.snapshots
+        for step, current, peak, _ in entries:
+            print(f"paso {step:>8}  actual {current / 1024.0:>10.1f} KB  pico {peak / 1024.0:>10.1f} KB",
+                  file=stream)
+        if self.first and self.snapshots:
+            for stat in self.snapshots[-1][3].compare_to(self.first[3], "lineno")[:limit]:
+                print(f"  {stat}", file=stream)
+
+
+class SpanExporter(ProofHooks):
+    """
+    Spans compatibles con OpenTelemetry: al terminar cada prueba escribe una
+    línea OTLP/JSON (resourceSpans) en 'path', legible por el receptor
+    otlpjsonfile del OpenTelemetry Collector. Cada prueba es una traza con
+    un span 'prove' y un span hijo por regla, división, cierre y
+    restricción existencial (las divisiones cuelgan de su regla).
+    """
+    
+    def __init__(self, path, service_name="logica-subatomica"):
+        self.path = path
+        self.service_name = service_name
+        self._spans = []
+        self._trace = None
+        self._root = None
+        self._rule = None   # (span_id, inicio) de la regla en curso
+    
+    @staticmethod
+    def attributes(values):
+        result = []
+        for key, value in values.items():
+            if isinstance(value, bool):
+                typed = {"boolValue": value}
+            elif isinstance(value, int):
+                typed = {"intValue": str(value)}
+            elif isinstance(value, float):
+                typed = {"doubleValue": value}
+            else:
+                typed = {"stringValue": str(value)}
+            result.append({"key": key, "value": typed})
+        return result
+    
+    def span(self, name, start, end, parent, span_id=None, **values):
+        span = {
+            "traceId": self._trace,
+            "spanId": span_id or os.urandom(8).hex(),
+            "name": name,
+            "kind": 1,
+            "startTimeUnixNano": str(start),
+            "endTimeUnixNano": str(end),
+            "attributes": self.attributes(values),
+        }
+        if parent:
+            span["parentSpanId"] = parent
+        self._spans.append(span)
+    
+    def finished(self, name, seconds, parent, **values):
+        end = time.time_ns()
+        self.span(name, end - int(seconds * 1e9), end, parent, **values)
+    
+    def proof_started(self, tableau):
+        self._trace = os.urandom(16).hex()
+        self._root = (os.urandom(8).hex(), time.time_ns())
+        self._spans = []
+    
+    def proof_finished(self, tableau, result):
+        root_id, start = self._root
+        self.span("prove", start, time.time_ns(), None, span_id=root_id,
+                  result="abandoned" if result is None else result,
+                  initial_formulas=len(tableau.initial_formulas),
+                  branches=len(tableau.branches))
+        record = {"resourceSpans": [{
+            "resource": {"attributes": self.attributes({"service.name": self.service_name})},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": self._spans}],
+        }]}
+        with open(self.path, "a", encoding="utf-8") as sink:
+            sink.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._spans = []
+    
+    def before_rule(self, rule, labeled_formula, branch):
+        self._rule = (os.urandom(8).hex(), time.time_ns())
+    
+    def after_rule(self, rule, labeled_formula, branch, seconds, added):
+        span_id, start = self._rule
+        self.span(type(rule).__name__, start, time.time_ns(), self._root[0], span_id=span_id,
+                  formula=str(labeled_formula.formula), state=labeled_formula.state, added=added)
+        self._rule = None
+    
+    def on_split(self, branch, children, seconds):
+        parent = self._rule[0] if self._rule else self._root[0]
+        self.finished("split_branch", seconds, parent,
+                      children=sum(1 for child in children if child is not None))
+    
+    def on_closure(self, branch, seconds):
+        parent = self._rule[0] if self._rule else self._root[0]
+        self.finished("closure", seconds, parent, formulas=len(branch.formulas))
+    
+    def on_restriction(self, branch, seconds):
+        self.finished("existential_restriction", seconds, self._root[0], added=branch is not None)
+
+
 # ============================================================================
 # MOTOR DE APLICACION AUTOMATICA
 # ============================================================================
@@ -1296,86 +2526,141 @@ ALL_RULES = [
 class TableauProver:
     """Motor que aplica reglas automaticamente"""
     
-    def __init__(self, rules=None, max_iterations=200):
+    def __init__(self, rules=None, max_iterations=200, policy=None, collect_stats=False, hooks=None):
         self.rules = rules if rules else ALL_RULES
         self.max_iterations = max_iterations
-        self.applied_rules = []
-        self.applied_formulas = set()  # Para evitar aplicar la misma regla dos veces
+        self.policy = policy if policy else HeuristicPolicy()
+        self.collect_stats = collect_stats
+        # Un ProofHooks, una lista de ellos o None (sin ganchos)
+        if hooks and not isinstance(hooks, ProofHooks):
+            hooks = HookChain(hooks)
+        self.hooks = hooks if hooks else None
+        self._candidates = {}   # Formula -> reglas que pueden aplicarse a ella (por prueba)
+        self.applied_rules = []     # (regla, fórmula) de la última prueba
+        self.stats = None           # ProofStats de la última prueba (con collect_stats)
+        self.tableau = None         # Tableau de la última prueba (ver snapshot.py)
+        self.exhausted = False      # La última prueba agotó max_iterations sin decidir
+        self.dropped_premises = []
+        self.unsat_core = None
+    
+    def rules_for(self, formula):
+        """Reglas de self.rules que pueden aplicarse a la fórmula (en orden)"""
+        rules = self._candidates.get(formula)
+        if rules is None:
+            rules = self._candidates[formula] = [r for r in self.rules if r.matches(formula)]
+        return rules
     
     def apply_existential_restriction(self, branch, tableau):
         """
-        Restriccion existencial: cuando no hay reglas aplicables,
-        para cada Qxyz existente, agregar terminos del contexto en y o z.
+        Restriccion existencial: cuando no hay reglas aplicables, agregar en
+        y o en z de una Qxyz solo lo que la semantica de Q obliga. Una
+        universal en x ([A]B o ¬<A>B) exige en cada Qxyz la alternativa
+        ¬A, y o su predicado (B o ¬B) en z: si una de las dos ya esta
+        contradicha en la rama, la otra es forzosa.
+        
+        Un termino del contexto no vale por eso en y ni en z (asumirlo hace
+        validos argumentos que no lo son, como <A>B => [A]B). Como las reglas
+        universales ya se aplican a cada relacion, esto solo agrega algo en
+        relaciones cuyas instancias no se expandieron (estados bloqueados);
+        si no, una rama sin reglas aplicables queda saturada y abierta.
         Retorna True si se aplico algo.
         """
-        relations = branch.get_all_relations()
-        formulas = branch.get_all_formulas()
-        
-        # Buscar relaciones Q
-        q_relations = [r for r in relations if isinstance(r, RelationQ)]
-        
-        if not q_relations:
-            return False
-        
-        # Extraer todos los terminos que aparecen en formulas categoriales
-        terms_in_context = set()
-        for lf in formulas:
-            f = lf.formula
-            if isinstance(f, Universal):
-                terms_in_context.add(f.subject)
-                terms_in_context.add(f.predicate)
-            elif isinstance(f, Particular):
-                terms_in_context.add(f.subject)
-                terms_in_context.add(f.predicate)
-        
-        # Para cada relacion Q, intentar agregar terminos
-        for rel in q_relations:
-            for term in terms_in_context:
-                # Verificar si ya existe este termino en el estado y
-                exists_in_y = any(
-                    isinstance(lf.formula, Existential) and 
-                    lf.formula.term == term and 
-                    lf.state == rel.y
-                    for lf in formulas
-                )
-                
-                if not exists_in_y:
-                    branch.add_formula(Existential(term), rel.y)
-                    return True
-                
-                # Tambien intentar en z
-                exists_in_z = any(
-                    isinstance(lf.formula, Existential) and 
-                    lf.formula.term == term and 
-                    lf.state == rel.z
-                    for lf in formulas
-                )
+        for rel in branch.get_all_relations():
+            # Solo relaciones Q (salvo las intercambiables con otra)
+            if not isinstance(rel, RelationQ) or rel.y in branch.equivalent:
+                continue
+            for lf in branch.universals.get(rel.x, ()):
+                formula = lf.formula
+                if isinstance(formula, Universal):
+                    right = (existential_of(formula.predicate), rel.z)
+                else:
+                    formula = formula.formula
+                    right = (negation_of(existential_of(formula.predicate)), rel.z)
+                left = (negation_of(existential_of(formula.subject)), rel.y)
                 
-                if not exists_in_z:
-                    branch.add_formula(Existential(term), rel.z)
-                    return True
+                for closed, forced in ((left, right), (right, left)):
+                    reason = branch.contradiction([closed])
+                    if reason is not None and branch.find(*forced) is None:
+                        added = branch.add_formula(*forced)
+                        added.deps = (lf.deps | reason.deps |
+                                      tableau.state_deps.get(forced[1], NO_DEPS))
+                        return True
         
         return False
     
-    def prove(self, formula, initial_state='w', verbose=False):
-        """Intentar probar una formula"""
+    def prove(self, formula, initial_state='w', verbose=False, out=None):
+        """Intentar probar una formula
+        
+        out: flujo donde escribir la traza (por defecto sys.stdout)
+        """
+        return run_steps(self.prove_steps(formula, initial_state, verbose, out))
+    
+    def prove_with_stats(self, formula, initial_state='w'):
+        """prove que retorna (resultado, ProofStats), aun sin collect_stats"""
+        return self._with_stats(lambda: self.prove(formula, initial_state))
+    
+    def prove_argument_with_stats(self, premises, conclusion):
+        """prove_argument que retorna (resultado, ProofStats), aun sin collect_stats"""
+        return self._with_stats(lambda: self.prove_argument(premises, conclusion))
+    
+    def _with_stats(self, proof):
+        collect, self.collect_stats = self.collect_stats, True
+        try:
+            result = proof()
+        finally:
+            self.collect_stats = collect
+        return result, self.stats
+    
+    def prove_steps(self, formula, initial_state='w', verbose=False, out=None):
+        """
+        Igual que prove, pero como generador: cede (iteracion, ramas abiertas)
+        al terminar cada iteracion y devuelve el resultado al agotarse.
+        Permite consultar el progreso o abandonar la busqueda entre pasos.
+        """
         negated = Negation(formula)
         tableau = Tableau([(negated, initial_state)])
         
         if verbose:
-            print("=== INTENTO DE PRUEBA ===")
-            print(f"Formula a probar: {formula}")
-            print(f"Negacion: {negated}\n")
-            print("Tableau inicial:")
-            print(tableau)
-            print("\n" + "="*50 + "\n")
+            print("=== INTENTO DE PRUEBA ===", file=out)
+            print(f"Formula a probar: {formula}", file=out)
+            print(f"Negacion: {negated}\n", file=out)
+            print("Tableau inicial:", file=out)
+            print(tableau, file=out)
+            print("\n" + "="*50 + "\n", file=out)
         
+        return (yield from self.expand_steps(tableau, verbose, out))
+    
+    def expand_steps(self, tableau, verbose=False, out=None):
+        """
+        Expandir un tableau ya construido hasta cerrarlo, saturarlo o agotar
+        max_iterations. Generador como prove_steps; devuelve True si cerró.
+        Cada llamada es una prueba nueva: reinicia applied_rules, stats y el
+        cache de reglas por fórmula (un probador compartido no acumula las
+        fórmulas de todas sus pruebas).
+        """
+        self.applied_rules = []
+        self._candidates = {}
+        self.tableau = tableau
+        self.exhausted = False
+        self.stats = ProofStats(tableau) if self.collect_stats else None
+        steps = self._expand_steps(tableau, verbose, out)
+        if self.hooks is not None:
+            steps = self.hooks.track(steps, tableau)
+        if self.stats is not None:
+            steps = self.stats.track(steps, tableau)
+        return (yield from steps)
+    
+    def _expand_steps(self, tableau, verbose, out):
+        stats = self.stats
+        hooks = self.hooks
         iteration = 0
         while iteration < self.max_iterations:
             iteration += 1
+            if stats is not None:
+                stats.iterations = iteration
             
             if verbose:
-                print(f"--- Iteracion {iteration} ---")
+                print(f"--- Iteracion {iteration} ---", file=out)
             
             applied_any = False
             current_branches = tableau.branches[:]
@@ -1384,93 +2669,417 @@ class TableauProver:
                 if branch.closed:
                     continue
                 
-                if branch.check_closure():
+                if stats is not None:
+                    stats.closure_checks += 1
+                if hooks is None:
+                    closed = branch.check_closure()
+                else:
+                    start = time.perf_counter()
+                    closed = branch.check_closure()
+                    if closed:
+                        hooks.on_closure(branch, time.perf_counter() - start)
+                if closed:
                     if verbose:
-                        print(f"Rama cerrada por contradiccion")
+                        print(f"Rama cerrada por contradiccion", file=out)
                     continue
                 
-                # Intentar aplicar reglas normales
+                # Intentar aplicar reglas normales (salvo en estados bloqueados
+                # o intercambiables con los de otra relación Q)
                 formulas = branch.get_all_formulas()
+                blocked = tableau.blocked_states(formulas) if tableau.state_parent else NO_DEPS
+                equivalent = tableau.interchangeable_states(branch)
+                if equivalent:
+                    blocked = blocked | equivalent.keys()
                 
+                # La politica elige la candidata de menor prioridad
+                best = None
                 for lf in formulas:
-                    for rule in self.rules:
-                        if rule.applies_to(lf, branch):
-                            if verbose:
-                                print(f"Aplicando {rule} a: {lf}")
-                            
-                            success = rule.apply(lf, branch, tableau)
-                            
-                            if success:
-                                self.applied_rules.append((rule, lf))
-                                applied_any = True
-                                
-                                if verbose:
-                                    print(f"Resultado:\n{tableau}\n")
-                                
-                                break
+                    if lf.state in blocked:
+                        continue
+                    for rule in self.rules_for(lf.formula):
+                        if rule.per_relation and not rule.applies_to(lf, branch):
+                            continue
+                        # Cada instancia se aplica una sola vez por rama
+                        instance = None if rule.per_relation else rule.instance(lf)
+                        if instance is not None and branch.was_applied(instance):
+                            continue
+                        
+                        key = self.policy.priority(rule, lf, branch)
+                        if best is None or key < best[0]:
+                            best = (key, rule, lf, instance)
+                        if key <= self.policy.best:
+                            break
                     
-                    if applied_any:
+                    if best is not None and best[0] <= self.policy.best:
                         break
                 
-                if applied_any:
-                    break
+                if best is not None:
+                    _, rule, lf, instance = best
+                    if verbose:
+                        print(f"Aplicando {rule} a: {lf}", file=out)
+                    
+                    n_formulas = len(branch.formulas)
+                    n_relations = len(branch.relations)
+                    if stats is None and hooks is None:
+                        success = rule.apply(lf, branch, tableau)
+                    else:
+                        if hooks is not None:
+                            hooks.before_rule(rule, lf, branch)
+                        start = time.perf_counter()
+                        success = rule.apply(lf, branch, tableau)
+                        seconds = time.perf_counter() - start
+                        if stats is not None:
+                            stats.record_rule(rule, seconds, success)
+                        if hooks is not None:
+                            added = len(branch.formulas) - n_formulas + len(branch.relations) - n_relations
+                            hooks.after_rule(rule, lf, branch, seconds, added)
+                    
+                    if success:
+                        tableau.record_dependencies(lf, branch, n_formulas, n_relations)
+                        if instance is not None:
+                            branch.mark_applied(instance)
+                        self.applied_rules.append((rule, lf))
+                        applied_any = True
+                        
+                        if verbose:
+                            print(f"Resultado:\n{tableau}\n", file=out)
+                        
+                        break
             
             # Si no se aplico ninguna regla, intentar restriccion existencial
             if not applied_any:
                 if verbose:
-                    print("No hay reglas aplicables. Intentando restriccion existencial...")
+                    print("No hay reglas aplicables. Intentando restriccion existencial...", file=out)
                 
+                if stats is not None:
+                    stats.restriction_passes += 1
+                if hooks is not None:
+                    start = time.perf_counter()
                 for branch in tableau.branches[:]:
                     if not branch.closed:
                         if self.apply_existential_restriction(branch, tableau):
+                            if stats is not None:
+                                stats.restriction_added += 1
                             if verbose:
-                                print("Aplicada restriccion existencial")
-                                print(f"Resultado:\n{tableau}\n")
+                                print("Aplicada restriccion existencial", file=out)
+                                print(f"Resultado:\n{tableau}\n", file=out)
                             applied_any = True
                             break
+                if hooks is not None:
+                    hooks.on_restriction(branch if applied_any else None, time.perf_counter() - start)
+            
+            # Verificar cierre (tambien sin reglas nuevas: una rama hija de
+            # un prefijo compartido puede cerrar con lo que ya hereda)
+            if tableau.is_closed():
+                if verbose:
+                    print("\n" + "="*50, file=out)
+                    print("TABLEAU CERRADO - La formula es VALIDA", file=out)
+                    print("="*50, file=out)
+                return True
             
             # Si aun no se aplico nada, terminar
             if not applied_any:
                 if verbose:
-                    print("No hay mas reglas ni restricciones aplicables")
+                    print("No hay mas reglas ni restricciones aplicables", file=out)
                 break
             
-            # Verificar cierre
-            if tableau.is_closed():
-                if verbose:
-                    print("\n" + "="*50)
-                    print("TABLEAU CERRADO - La formula es VALIDA")
-                    print("="*50)
-                return True
+            yield iteration, tableau.count_open()
+        else:
+            # Se agotó el presupuesto con ramas aún expandibles
+            self.exhausted = True
         
         if verbose:
-            print("\n" + "="*50)
-            print("Tableau NO cerrado - La formula NO es valida")
-            print("="*50)
-            print("\nTableau final:")
-            print(tableau)
+            print("\n" + "="*50, file=out)
+            print("Tableau NO cerrado - La formula NO es valida", file=out)
+            print("="*50, file=out)
+            print("\nTableau final:", file=out)
+            print(tableau, file=out)
         
         return False
     
-    def prove_argument(self, premises, conclusion, verbose=False):
+    def prove_argument(self, premises, conclusion, verbose=False, out=None):
         """Probar un argumento: premises ⊢ conclusion"""
-        if not premises:
-            return self.prove(conclusion, verbose=verbose)
-        
-        conj = premises[0]
-        for premise in premises[1:]:
-            conj = Conjunction(conj, premise)
-        
-        argument = Conditional(conj, conclusion)
+        return run_steps(self.prove_argument_steps(premises, conclusion, verbose, out))
+    
+    def prove_argument_steps(self, premises, conclusion, verbose=False, out=None):
+        """
+        Version generadora de prove_argument (ver prove_steps).
+        Las premisas y la conclusion negada son formulas iniciales separadas,
+        asi que al cerrar queda en unsat_core que premisas uso la prueba.
+        """
+        premises, self.dropped_premises = reduce_premises(premises)
+        self.unsat_core = None
+        negated = Negation(conclusion)
+        tableau = Tableau([(p, 'w') for p in premises] + [(negated, 'w')])
         
         if verbose:
-            print("=== PRUEBA DE ARGUMENTO ===")
-            print("Premisas:")
+            print("=== PRUEBA DE ARGUMENTO ===", file=out)
+            print("Premisas:", file=out)
             for i, p in enumerate(premises, 1):
-                print(f"  {i}. {p}")
-            print(f"Conclusion: {conclusion}\n")
+                print(f"  {i}. {p}", file=out)
+            for p, by in self.dropped_premises:
+                print(f"  (descartada: {p}, implicada por {by})", file=out)
+            print(f"Conclusion: {conclusion}\n", file=out)
+            print("Tableau inicial:", file=out)
+            print(tableau, file=out)
+            print("\n" + "="*50 + "\n", file=out)
+        
+        result = yield from self.expand_steps(tableau, verbose, out)
+        if result:
+            used = tableau.closure_dependencies()
+            self.unsat_core = [p for i, p in enumerate(premises) if i in used]
+        return result
+    
+    def minimal_core(self, premises, conclusion):
+        """
+        Nucleo minimo del argumento: ninguna premisa sobra (None si no es valido).
+        Parte del nucleo de la prueba y quita las premisas de a una; cuando
+        la prueba vuelve a cerrar, el candidato se reduce a su nucleo, asi
+        que las premisas que esa prueba no uso no se prueban por separado.
+        """
+        if not self.prove_argument(premises, conclusion):
+            return None
+        
+        core = self.unsat_core
+        i = 0
+        while i < len(core):
+            trial = core[:i] + core[i+1:]
+            if self.prove_argument(trial, conclusion):
+                core = self.unsat_core
+            else:
+                i += 1
         
-        return self.prove(argument, verbose=verbose)
+        self.unsat_core = core
+        return core
+
+
+class ProofCancelled(Exception):
+    """La busqueda se abandono antes de terminar"""
+    pass
+
+
+def run_steps(steps):
+    """Consumir un generador de prove_steps y retornar su resultado"""
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+
+# ============================================================================
+# BASE DE CONOCIMIENTO
+# ============================================================================
+
+class KnowledgeBase:
+    """
+    Premisas fijas expandidas una sola vez.
+    
+    El tableau de las premisas se satura al construir la base (hasta
+    max_iterations del probador) y queda como prefijo compartido. Cada
+    consulta solo agrega la conclusión negada en ramas hijas copy-on-write
+    de las hojas abiertas, así que muchas conclusiones sobre las mismas
+    premisas no repiten la expansión de estas.
+    
+    Si el presupuesto no alcanza para saturar las premisas, exhausted queda
+    en True: cada consulta sigue entonces la expansión pendiente dentro de
+    su propio presupuesto (el resultado es correcto, pero esa parte se
+    repite por consulta). Una consulta que agota el presupuesto retorna
+    None (sin decidir), no False.
+    """
+    
+    def __init__(self, premises, prover=None, initial_state='w'):
+        self.premises, self.dropped = reduce_premises(list(premises))
+        self.prover = prover if prover else TableauProver()
+        self.initial_state = initial_state
+        self.tableau = Tableau([(p, initial_state) for p in self.premises])
+        
+        run_steps(self.prover.expand_steps(self.tableau))
+        self.exhausted = self.prover.exhausted
+        self.tableau.is_closed()
+        # Instantánea de las hojas abiertas: las consultas nunca modifican el prefijo
+        self.leaves = [b for b in self.tableau.branches if not b.closed]
+    
+    @property
+    def inconsistent(self):
+        """Las premisas son contradictorias (todo se sigue de ellas)"""
+        return not self.leaves
+    
+    def query_steps(self, conclusion, verbose=False, out=None):
+        """Version generadora de query (ver TableauProver.prove_steps)"""
+        if self.inconsistent:
+            return True
+        
+        tableau = self.tableau.fork(self.leaves, [(Negation(conclusion), self.initial_state)])
+        if verbose:
+            print(f"=== CONSULTA: {conclusion} ===", file=out)
+            print(f"Prefijo compartido: {len(self.leaves)} rama(s) abierta(s)"
+                  f"{' (sin saturar)' if self.exhausted else ''}\n", file=out)
+        result = yield from self.prover.expand_steps(tableau, verbose, out)
+        return None if self.prover.exhausted else result
+    
+    def query(self, conclusion, verbose=False, out=None):
+        """
+        ¿Se sigue la conclusión de las premisas? True, False o None si se
+        agotó el presupuesto sin decidirlo
+        """
+        return run_steps(self.query_steps(conclusion, verbose, out))
+    
+    def query_many(self, conclusions):
+        """Consultar varias conclusiones; retorna la lista de resultados"""
+        return [self.query(c) for c in conclusions]
+    
+    def conclusions(self, vocabulary):
+        """
+        Todas las conclusiones categoriales válidas sobre el vocabulario.
+        Retorna (válidas, sin decidir): las que agotaron el presupuesto no
+        se cuentan como inválidas.
+        
+        Cada candidata es una consulta sobre el prefijo compartido. Con la
+        semántica de Q no hay implicaciones entre las formas categoriales
+        de un par de términos ([S]P no implica <S>P: puede no haber
+        ninguna Qxyz con S en y), así que ninguna queda decidida por otra.
+        """
+        valid = []
+        undecided = []
+        for candidate in categorical_candidates(list(dict.fromkeys(vocabulary))):
+            result = self.query(candidate)
+            if result:
+                valid.append(candidate)
+            elif result is None:
+                undecided.append(candidate)
+        return valid, undecided
+
+
+# ============================================================================
+# CONCLUSIONES VALIDAS
+# ============================================================================
+
+def categorical_forms(subject, predicate):
+    """Las cuatro formas categoriales: [S]P, 《S》P, ¬[S]P, ¬《S》P"""
+    return (Universal(subject, predicate), Particular(subject, predicate),
+            Negation(Universal(subject, predicate)), Negation(Particular(subject, predicate)))
+
+
+def categorical_candidates(vocabulary):
+    """Las formas categoriales entre cada par de términos distintos del vocabulario"""
+    return [form for subject in vocabulary for predicate in vocabulary
+            if subject != predicate for form in categorical_forms(subject, predicate)]
+
+
+def categorical_terms(formulas):
+    """Términos de las fórmulas categoriales, en orden de aparición"""
+    terms = {}
+    pending = list(reversed(formulas))
+    while pending:
+        formula = pending.pop()
+        if isinstance(formula, (Universal, Particular)):
+            terms[formula.subject] = None
+            terms[formula.predicate] = None
+        elif isinstance(formula, Negation):
+            pending.append(formula.formula)
+        elif isinstance(formula, Conditional):
+            pending.extend((formula.consequent, formula.antecedent))
+        elif isinstance(formula, (Conjunction, Disjunction, Biconditional)):
+            pending.extend((formula.right, formula.left))
+    return list(terms)
+
+
+def valid_conclusions(premises, vocabulary=None, prover=None):
+    """
+    ¿Qué se sigue de las premisas? Todas las conclusiones categoriales
+    válidas sobre el vocabulario (por defecto, los términos de las premisas),
+    con las premisas expandidas una sola vez. Retorna (válidas, sin decidir)
+    como KnowledgeBase.conclusions.
+    """
+    if vocabulary is None:
+        vocabulary = categorical_terms(premises)
+    return KnowledgeBase(premises, prover).conclusions(vocabulary)
+
+
+# ============================================================================
+# API ASINCRONA
+# ============================================================================
+
+YIELD_EVERY = 32        # Ceder el bucle de eventos cada N aplicaciones de reglas
+YIELD_MS = 5.0          # ... o cada M milisegundos, lo que ocurra antes
+
+
+async def run_steps_async(steps, yield_every=YIELD_EVERY, yield_ms=YIELD_MS):
+    """
+    Consumir un generador de prove_steps cediendo el control al bucle de
+    eventos cada yield_every iteraciones o cada yield_ms milisegundos.
+    Si la tarea se cancela, asyncio.CancelledError detiene la busqueda.
+    """
+    if yield_every < 1:
+        raise ValueError("yield_every debe ser al menos 1")
+    if yield_ms <= 0:
+        raise ValueError("yield_ms debe ser positivo")
+    budget = yield_ms / 1000.0
+    try:
+        while True:
+            deadline = time.perf_counter() + budget
+            for _ in range(yield_every):
+                try:
+                    next(steps)
+                except StopIteration as stop:
+                    return stop.value
+                if time.perf_counter() >= deadline:
+                    break
+            await asyncio.sleep(0)
+    finally:
+        steps.close()
+
+
+async def prove_async(formula, prover=None, yield_every=YIELD_EVERY, yield_ms=YIELD_MS):
+    """Probar una formula sin bloquear el bucle de eventos"""
+    prover = prover if prover else TableauProver()
+    return await run_steps_async(prover.prove_steps(formula), yield_every, yield_ms)
+
+
+async def prove_argument_async(premises, conclusion, prover=None,
+                               yield_every=YIELD_EVERY, yield_ms=YIELD_MS):
+    """Probar un argumento sin bloquear el bucle de eventos"""
+    prover = prover if prover else TableauProver()
+    steps = prover.prove_argument_steps(premises, conclusion)
+    return await run_steps_async(steps, yield_every, yield_ms)
+
+
+_process_pool = None
+
+
+def get_process_pool():
+    """Pool de procesos compartido (se crea al primer uso)"""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor()
+    return _process_pool
+
+
+def _prove_in_worker(argument, encoded, max_iterations):
+    """Punto de entrada en el proceso trabajador (fórmulas codificadas)"""
+    prover = TableauProver(max_iterations=max_iterations)
+    if argument:
+        return prover.prove_argument(*decode_argument(encoded))
+    return prover.prove(decode_formulas(encoded)[0])
+
+
+async def prove_offloaded(formula, premises=None, max_iterations=200, executor=None):
+    """
+    Probar en un pool de procesos (casos pesados) y esperar el resultado.
+    Con premises se prueba el argumento premises ⊢ formula.
+    Cancelar la espera no interrumpe al proceso trabajador: su resultado
+    simplemente se descarta.
+    """
+    loop = asyncio.get_running_loop()
+    executor = executor if executor else get_process_pool()
+    if premises is None:
+        argument, encoded = False, encode_formulas([formula])
+    else:
+        argument, encoded = True, encode_argument(premises, formula)
+    return await loop.run_in_executor(
+        executor, _prove_in_worker, argument, encoded, max_iterations
+    )
 
 
 if __name__ == "__main__":
@@ -1548,4 +3157,10 @@ if __name__ == "__main__":
     print("\n" + "="*60)
     print("Sistema listo. Para usar la interfaz web, ejecuta:")
     print("  streamlit run app.py")
+    print("Para probar un corpus por lotes (JSONL o texto):")
+    print("  python cli.py corpus.jsonl --jobs 4")
+    print("Para medir el rendimiento contra la referencia:")
+    print("  python bench.py --baseline bench_baseline.json")
+    print("Para comparar el tableau con una busqueda de contramodelos:")
+    print("  python difftest.py --count 300")
     print("="*60)
@@ -0,0 +1,133 @@
+"""
+Lógica Subatómica - Benchmarks de escalamiento
+
+Varia un parametro del generador a la vez (los demas quedan en su valor
+base) y tabula, para cada valor, el tiempo medio y maximo, las reglas
+aplicadas, el pico de memoria y cuantas pruebas agotaron el presupuesto.
+La columna 'crec.' es el factor de crecimiento del tiempo medio respecto
+de la fila anterior: un factor que sube fila a fila indica un punto
+super-lineal.
+
+Uso:
+    python scaling.py
+    python scaling.py --knob depth --knob terms --samples 50 --seed 3
+    python scaling.py --csv escalamiento.csv
+"""
+
+import argparse
+import csv
+import statistics
+import sys
+import time
+import tracemalloc
+
+from generate import FormulaGenerator
+from logic import parse, TableauProver, run_steps
+
+
+DEFAULT_ITERATIONS = 200
+
+# Valor base de cada parametro
+BASE = {"depth": 2, "premises": 2, "terms": 4, "quantifiers": 0.6, "operators": 0.2}
+
+# Valores a recorrer por parametro
+KNOBS = {
+    "depth": [1, 2, 3, 4, 5],
+    "premises": [0, 1, 2, 4, 6, 8],
+    "terms": [1, 2, 4, 6, 8, 12],
+    "quantifiers": [0.0, 0.25, 0.5, 0.75, 1.0],
+    "operators": [0.0, 0.2, 0.4, 0.6, 0.8],
+}
+
+
+def run_once(premises, conclusion, max_iterations):
+    """Una corrida: (reglas aplicadas, si se agoto el presupuesto)"""
+    prover = TableauProver(max_iterations=max_iterations)
+    if premises:
+        run_steps(prover.prove_argument_steps(premises, conclusion))
+    else:
+        run_steps(prover.prove_steps(conclusion))
+    return len(prover.applied_rules), prover.exhausted
+
+
+def measure_point(params, samples, seed, max_iterations, memory=True):
+    """Medir 'samples' argumentos generados con los parametros dados"""
+    generator = FormulaGenerator(seed, params["depth"], params["terms"],
+                                 params["quantifiers"], params["operators"])
+    times = []
+    rules = []
+    peak_kb = 0.0
+    exhausted = 0
+    for _ in range(samples):
+        texts, conclusion_text = generator.argument(params["premises"])
+        premises = [parse(t) for t in texts]
+        conclusion = parse(conclusion_text)
+
+        start = time.perf_counter()
+        applied, out_of_budget = run_once(premises, conclusion, max_iterations)
+        times.append((time.perf_counter() - start) * 1000.0)
+        rules.append(applied)
+        if out_of_budget:
+            exhausted += 1
+
+        if memory:
+            tracemalloc.start()
+            try:
+                run_once(premises, conclusion, max_iterations)
+                peak_kb = max(peak_kb, tracemalloc.get_traced_memory()[1] / 1024.0)
+            finally:
+                tracemalloc.stop()
+
+    return {
+        "mean_ms": statistics.mean(times),
+        "max_ms": max(times),
+        "rules": statistics.mean(rules),
+        "peak_kb": peak_kb,
+        "exhausted": exhausted,
+    }
+
+
+def sweep(knob, samples=30, seed=0, max_iterations=DEFAULT_ITERATIONS, memory=True):
+    """Generar (valor, resultados) variando solo 'knob'"""
+    for value in KNOBS[knob]:
+        params = dict(BASE, **{knob: value})
+        yield value, measure_point(params, samples, seed, max_iterations, memory)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Escalamiento del probador por parametro del generador")
+    parser.add_argument("--knob", action="append", choices=list(KNOBS),
+                        help="Parametro a variar (repetible; por defecto todos)")
+    parser.add_argument("--samples", type=int, default=30, help="Argumentos por punto")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--no-memory", action="store_true", help="No medir memoria (mas rapido)")
+    parser.add_argument("--csv", help="Escribir tambien los resultados en CSV")
+    args = parser.parse_args(argv)
+
+    rows = []
+    for knob in args.knob or list(KNOBS):
+        print(f"\n{knob} (base: {', '.join(f'{k}={v}' for k, v in BASE.items() if k != knob)})")
+        print(f"{'valor':>8}{'media ms':>11}{'max ms':>10}{'crec.':>7}{'reglas':>9}"
+              f"{'max KB':>10}{'agotadas':>10}")
+        previous = None
+        for value, result in sweep(knob, args.samples, args.seed, args.max_iterations,
+                                   not args.no_memory):
+            growth = f"{result['mean_ms'] / previous:.2f}" if previous else "-"
+            previous = result["mean_ms"]
+            print(f"{value:>8}{result['mean_ms']:>11.2f}{result['max_ms']:>10.2f}{growth:>7}"
+                  f"{result['rules']:>9.1f}{result['peak_kb']:>10.1f}"
+                  f"{result['exhausted']:>6}/{args.samples}")
+            rows.append(dict(result, knob=knob, value=value))
+
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as sink:
+            writer = csv.DictWriter(sink, fieldnames=["knob", "value", "mean_ms", "max_ms",
+                                                      "rules", "peak_kb", "exhausted"])
+            writer.writeheader()
+            writer.writerows(rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,250 @@
+"""
+Lógica Subatómica - Servicio local JSON sobre HTTP
+
+Endpoints (POST, cuerpo JSON):
+    /parse            {"formula": "[A]B"}
+    /prove            {"formula": "A | -A", "max_iterations": 200}
+    /prove-argument   {"premises": ["[A]B", "[B]C"], "conclusion": "[A]C"}
+    GET /stats        contadores de cache y coalescencia
+
+Las pruebas se ejecutan en un pool de procesos pre-lanzado. Los resultados se
+guardan en una cache LRU compartida y las peticiones identicas en curso se
+coalescen: solo se ejecuta una busqueda y todas reciben su resultado.
+Las formulas se parsean una vez aqui y viajan al pool con la codificacion
+binaria de logic.py, que tambien es la clave de la cache (textos que solo
+difieren en espacios o parentesis comparten entrada).
+
+Uso:
+    python service.py --port 8765 --workers 4
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from logic import (parse, ParseError, TableauProver, encode_formulas, decode_formulas,
+                   encode_argument, decode_argument)
+
+
+DEFAULT_ITERATIONS = 200
+MAX_ITERATIONS = 20000
+DEFAULT_TIMEOUT = 30.0
+CACHE_SIZE = 4096
+MAX_BODY = 1 << 20
+
+
+# ============================================================================
+# TRABAJO EN LOS PROCESOS
+# ============================================================================
+
+def _warm_up():
+    """Tarea vacia para forzar el arranque de cada proceso trabajador"""
+    return True
+
+
+def _prove_job(argument, encoded, max_iterations):
+    """Decodificar y probar dentro de un proceso trabajador"""
+    start = time.perf_counter()
+    prover = TableauProver(max_iterations=max_iterations)
+    if argument:
+        valid = prover.prove_argument(*decode_argument(encoded))
+    else:
+        valid = prover.prove(decode_formulas(encoded)[0])
+    return {"valid": valid, "elapsed_ms": (time.perf_counter() - start) * 1000.0}
+
+
+# ============================================================================
+# SERVICIO
+# ============================================================================
+
+class RequestError(Exception):
+    """Peticion mal formada (se responde con 400)"""
+    pass
+
+
+class ProvingService:
+    """Pool de procesos + cache LRU + coalescencia de peticiones en curso"""
+
+    def __init__(self, workers=None, cache_size=CACHE_SIZE, max_iterations=MAX_ITERATIONS,
+                 timeout=DEFAULT_TIMEOUT):
+        self.workers = workers if workers else os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.cache_size = cache_size
+        self.max_iterations = max_iterations
+        self.timeout = timeout
+        self._cache = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "hits": 0, "misses": 0, "coalesced": 0}
+
+        # Pre-lanzar todos los procesos para no pagar el arranque en la primera peticion
+        for future in [self.executor.submit(_warm_up) for _ in range(self.workers)]:
+            future.result()
+
+    def budget(self, payload):
+        """Presupuesto de iteraciones de la peticion, acotado por el del servidor"""
+        value = payload.get("max_iterations", DEFAULT_ITERATIONS)
+        # bool es subclase de int: true no es un presupuesto de 1
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+            raise RequestError("'max_iterations' must be a positive integer")
+        return min(value, self.max_iterations)
+
+    def parse(self, payload):
+        text = _field(payload, "formula", str)
+        return {"formula": str(parse(text))}
+
+    def prove(self, payload):
+        # Los errores de sintaxis se reportan sin usar el pool
+        formula = parse(_field(payload, "formula", str))
+        return self._submit(False, encode_formulas([formula]), self.budget(payload))
+
+    def prove_argument(self, payload):
+        premises = _field(payload, "premises", list)
+        if not all(isinstance(p, str) for p in premises):
+            raise RequestError("'premises' must be a list of strings")
+        premises = [parse(p) for p in premises if p.strip()]
+        conclusion = parse(_field(payload, "conclusion", str))
+        return self._submit(True, encode_argument(premises, conclusion), self.budget(payload))
+
+    def _submit(self, argument, encoded, max_iterations):
+        key = (argument, encoded, max_iterations)
+
+        with self._lock:
+            self.stats["requests"] += 1
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+                return dict(self._cache[key], cached=True)
+
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                self.stats["misses"] += 1
+                future = self.executor.submit(_prove_job, argument, encoded, max_iterations)
+                self._inflight[key] = future
+            else:
+                self.stats["coalesced"] += 1
+
+        if owner:
+            # Fuera del lock: si ya termino, el callback corre en este mismo hilo
+            future.add_done_callback(lambda f: self._store(key, f))
+
+        result = future.result(timeout=self.timeout)
+        return dict(result, cached=False)
+
+    def _store(self, key, future):
+        """Mover un resultado terminado de 'en curso' a la cache"""
+        with self._lock:
+            self._inflight.pop(key, None)
+            if future.cancelled() or future.exception() is not None:
+                return
+            self._cache[key] = future.result()
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, cache_entries=len(self._cache), inflight=len(self._inflight))
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _field(payload, name, kind):
+    value = payload.get(name)
+    if not isinstance(value, kind):
+        raise RequestError(f"'{name}' must be a {kind.__name__}")
+    return value
+
+
+# ============================================================================
+# HTTP
+# ============================================================================
+
+class Handler(BaseHTTPRequestHandler):
+    """Traduce peticiones HTTP/JSON a llamadas del ProvingService"""
+
+    service = None
+    routes = {
+        "/parse": "parse",
+        "/prove": "prove",
+        "/prove-argument": "prove_argument",
+    }
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._reply(200, self.service.snapshot())
+        else:
+            self._reply(404, {"error": f"Unknown endpoint: {self.path}"})
+
+    def do_POST(self):
+        method = self.routes.get(self.path)
+        if method is None:
+            self._reply(404, {"error": f"Unknown endpoint: {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            if length < 0:
+                raise RequestError("Invalid Content-Length")
+            if length > MAX_BODY:
+                raise RequestError("Request body too large")
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(payload, dict):
+                raise RequestError("Request body must be a JSON object")
+            self._reply(200, getattr(self.service, method)(payload))
+        except (RequestError, ParseError, ValueError) as e:
+            self._reply(400, {"error": str(e)})
+        except TimeoutError:
+            self._reply(504, {"error": "Proof timed out"})
+        except Exception as e:
+            # Cualquier otro error (p. ej. BrokenProcessPool si murio un
+            # trabajador) tambien recibe respuesta en lugar de cortar la conexion
+            self._reply(500, {"error": f"Internal error: {type(e).__name__}: {e}"})
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host="127.0.0.1", port=8765, workers=None, cache_size=CACHE_SIZE,
+          max_iterations=MAX_ITERATIONS, timeout=DEFAULT_TIMEOUT):
+    """Arrancar el servicio y atender peticiones hasta Ctrl+C"""
+    service = ProvingService(workers, cache_size, max_iterations, timeout)
+    handler = type("BoundHandler", (Handler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"Servicio escuchando en http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servicio local de pruebas de logica subatomica")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Procesos trabajadores (por defecto, uno por CPU)")
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE)
+    parser.add_argument("--max-iterations", type=int, default=MAX_ITERATIONS,
+                        help="Tope del presupuesto por peticion")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help="Segundos maximos de espera por prueba")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, args.cache_size, args.max_iterations, args.timeout)
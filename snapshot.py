@@ -0,0 +1,457 @@
+"""
+Lógica Subatómica - Instantáneas binarias de tableaux
+
+Guarda un tableau a medio expandir (todas sus ramas, relaciones, fórmulas
+con sus dependencias, instancias de reglas aplicadas, var_counter, el
+estado de dependencias y bloqueo y los estados intercambiables) para
+continuarlo después con otro presupuesto, en lugar de empezar de nuevo.
+Un archivo truncado o corrupto se rechaza con SnapshotError.
+
+Formato (enteros u32 little-endian):
+    cabecera    b"LSTB", version, cantidad de secciones, (offset, bytes) por sección
+    secciones   alineadas a 4 bytes, en el orden de SECTIONS. Las tablas son
+                registros de ancho fijo, así que se leen directamente sobre
+                el archivo mapeado en memoria (mmap + memoryview.cast), sin
+                copiarlo; solo se crean los objetos del tableau.
+    nodos       términos y fórmulas sin repetir (kind, hijo, hijo), cada uno
+                después de sus hijos; se decodifican a nodos internados
+    info        JSON con datos del probador (presupuesto, tipo de prueba...)
+
+Uso:
+    python cli.py corpus.jsonl --snapshots pendientes/
+    python snapshot.py info pendientes/7.snap
+    python snapshot.py resume pendientes/7.snap --max-iterations 5000
+"""
+
+import argparse
+import json
+import mmap
+import struct
+import sys
+from array import array
+
+from logic import (AtomicTerm, Complement, Privation, Existential, Universal, Particular,
+                   Negation, Conjunction, Disjunction, Conditional, Biconditional,
+                   Branch, Tableau, TableauProver, RelationQ, RelationS, Rule,
+                   intern_node, run_steps)
+
+
+MAGIC = b"LSTB"
+VERSION = 2
+
+SECTIONS = (
+    "strings",          # bytes: nombres de términos, estados y reglas (UTF-8)
+    "string_ends",      # fin de cada cadena en 'strings'
+    "nodes",            # (kind, a, b) por término o fórmula
+    "deps_ends",        # fin de cada conjunto de dependencias en 'deps'
+    "deps",             # índices de fórmulas iniciales
+    "relations",        # (kind, x, y, z): 0 = Qxyz, 1 = Sxy (z sin usar)
+    "branches",         # ver BRANCH_FIELDS
+    "formulas",         # (nodo, estado, dependencias) por fórmula etiquetada
+    "branch_relations", # relaciones propias de cada rama
+    "applied",          # (regla, nodo, estado, relación + 1) por instancia aplicada
+    "leaves",           # ramas de tableau.branches, en orden
+    "initial",          # (nodo, estado) de las fórmulas iniciales
+    "state_deps",       # (estado, dependencias)
+    "state_parent",     # (estado, estado padre)
+    "equivalent",       # (estado intercambiable, representante)
+    "counters",         # raíz, var_counter, pruned_deps, ramas creadas, podadas, cierres revisados
+    "info",             # bytes: JSON
+)
+BYTE_SECTIONS = {"strings", "info"}
+
+# Orden fijo de los tipos de nodo: es parte del formato, solo se agregan al final
+NODE_KINDS = (AtomicTerm, Complement, Privation, Existential, Universal, Particular,
+              Negation, Conjunction, Disjunction, Conditional, Biconditional)
+KIND_OF = {cls: kind for kind, cls in enumerate(NODE_KINDS)}
+
+# (padre + 1, cerrada, closed_by + 1, inicio y fin en formulas, branch_relations, applied)
+BRANCH_FIELDS = 9
+NONE = 0xFFFFFFFF
+
+
+class SnapshotError(Exception):
+    """Archivo que no es una instantánea válida"""
+    pass
+
+
+# ============================================================================
+# ESCRITURA
+# ============================================================================
+
+class _Writer:
+    """Tablas de cadenas, nodos, dependencias y relaciones sin repetidos"""
+
+    def __init__(self):
+        self.strings = {}
+        self.nodes = {}
+        self.deps = {}
+        self.relations = {}
+        self.sections = {name: array("I") for name in SECTIONS if name not in BYTE_SECTIONS}
+        self.sections["deps_ends"].append(0)
+
+    def string(self, text):
+        index = self.strings.get(text)
+        if index is None:
+            index = self.strings[text] = len(self.strings)
+        return index
+
+    def node(self, node):
+        index = self.nodes.get(node)
+        if index is not None:
+            return index
+        if isinstance(node, AtomicTerm):
+            record = (0, self.string(node.name), 0)
+        else:
+            children = [self.node(getattr(node, field)) for field in node._fields]
+            record = (KIND_OF[type(node)], children[0], children[1] if len(children) > 1 else 0)
+        self.sections["nodes"].extend(record)
+        index = self.nodes[node] = len(self.nodes)
+        return index
+
+    def dependencies(self, deps):
+        index = self.deps.get(deps)
+        if index is None:
+            index = self.deps[deps] = len(self.deps)
+            self.sections["deps"].extend(sorted(deps))
+            self.sections["deps_ends"].append(len(self.sections["deps"]))
+        return index
+
+    def relation(self, relation):
+        index = self.relations.get(relation)
+        if index is None:
+            index = self.relations[relation] = len(self.relations)
+            if isinstance(relation, RelationQ):
+                record = (0, self.string(relation.x), self.string(relation.y), self.string(relation.z))
+            else:
+                record = (1, self.string(relation.x), self.string(relation.y), NONE)
+            self.sections["relations"].extend(record)
+        return index
+
+
+def _all_branches(tableau):
+    """Ramas del árbol (la raíz y las antecesoras de las hojas), cada una después de su padre"""
+    order = {}
+    for leaf in [tableau.root] + tableau.branches:
+        chain = []
+        branch = leaf
+        while branch is not None and branch not in order:
+            chain.append(branch)
+            branch = branch.parent
+        for branch in reversed(chain):
+            order[branch] = len(order)
+    return order
+
+
+def _instance_key(instance):
+    rule, formula, state, relation = instance
+    return rule.__name__, str(formula), state, str(relation) if relation else ""
+
+
+def dumps(tableau, **info):
+    """Instantánea del tableau como bytes; info se guarda como JSON"""
+    writer = _Writer()
+    sections = writer.sections
+    order = _all_branches(tableau)
+
+    for branch in order:
+        start = (len(sections["formulas"]) // 3, len(sections["branch_relations"]),
+                 len(sections["applied"]) // 4)
+        for lf in branch.formulas:
+            sections["formulas"].extend((writer.node(lf.formula), writer.string(lf.state),
+                                         writer.dependencies(lf.deps)))
+        for relation in branch.relations:
+            sections["branch_relations"].append(writer.relation(relation))
+        # Ordenadas, para que la misma rama dé siempre los mismos bytes
+        for instance in sorted(branch.applied, key=_instance_key):
+            rule, formula, state, relation = instance
+            sections["applied"].extend((writer.string(rule.__name__), writer.node(formula),
+                                        writer.string(state),
+                                        0 if relation is None else writer.relation(relation) + 1))
+        closed_by = 0 if branch.closed_by is None else writer.dependencies(branch.closed_by) + 1
+        sections["branches"].extend((
+            0 if branch.parent is None else order[branch.parent] + 1,
+            int(branch.closed), closed_by,
+            start[0], len(sections["formulas"]) // 3,
+            start[1], len(sections["branch_relations"]),
+            start[2], len(sections["applied"]) // 4,
+        ))
+
+    sections["leaves"].extend(order[branch] for branch in tableau.branches)
+    for formula, state in tableau.initial_formulas:
+        sections["initial"].extend((writer.node(formula), writer.string(state)))
+    for state, deps in tableau.state_deps.items():
+        sections["state_deps"].extend((writer.string(state), writer.dependencies(deps)))
+    for state, parent in tableau.state_parent.items():
+        sections["state_parent"].extend((writer.string(state), writer.string(parent)))
+    for state, representative in tableau.equivalent.items():
+        sections["equivalent"].extend((writer.string(state), writer.string(representative)))
+    sections["counters"].extend((order[tableau.root], tableau.var_counter,
+                                 writer.dependencies(frozenset(tableau.pruned_deps)),
+                                 tableau.branches_created, tableau.pruned_children,
+                                 tableau.closure_checks))
+
+    encoded = [text.encode("utf-8") for text in writer.strings]
+    ends = sections["string_ends"]
+    total = 0
+    for chunk in encoded:
+        total += len(chunk)
+        ends.append(total)
+
+    payloads = []
+    for name in SECTIONS:
+        if name == "strings":
+            payload = b"".join(encoded)
+        elif name == "info":
+            payload = json.dumps(info, ensure_ascii=False).encode("utf-8")
+        else:
+            table = sections[name]
+            if sys.byteorder != "little":
+                table.byteswap()
+            payload = table.tobytes()
+        payloads.append(payload)
+
+    header_size = 12 + 8 * len(SECTIONS)
+    directory = []
+    offset = header_size
+    for payload in payloads:
+        directory.append((offset, len(payload)))
+        offset += len(payload) + (-len(payload) % 4)
+    parts = [MAGIC, struct.pack("<II", VERSION, len(SECTIONS))]
+    parts += [struct.pack("<II", *entry) for entry in directory]
+    for payload in payloads:
+        parts += [payload, b"\0" * (-len(payload) % 4)]
+    return b"".join(parts)
+
+
+def save(path, tableau, **info):
+    """Escribir la instantánea del tableau en path"""
+    data = dumps(tableau, **info)
+    with open(path, "wb") as sink:
+        sink.write(data)
+    return len(data)
+
+
+# ============================================================================
+# LECTURA
+# ============================================================================
+
+def _rule_classes():
+    classes = {}
+    pending = [Rule]
+    while pending:
+        cls = pending.pop()
+        classes[cls.__name__] = cls
+        pending.extend(cls.__subclasses__())
+    return classes
+
+
+class Snapshot:
+    """Tableau reconstruido y el info con que se guardó"""
+
+    def __init__(self, tableau, info):
+        self.tableau = tableau
+        self.info = info
+
+    def resume_steps(self, prover, verbose=False, out=None):
+        """
+        Continuar la expansión con el presupuesto de prover (generador como
+        expand_steps). Si la instantánea es de un argumento, al cerrar deja
+        prover.unsat_core como prove_argument.
+        """
+        tableau = self.tableau
+        result = yield from prover.expand_steps(tableau, verbose, out)
+        if result and self.info.get("argument"):
+            used = tableau.closure_dependencies()
+            premises = tableau.initial_formulas[:-1]
+            prover.unsat_core = [f for i, (f, _) in enumerate(premises) if i in used]
+        return result
+
+    def resume(self, prover=None):
+        """Continuar hasta decidir o agotar el presupuesto; retorna el resultado"""
+        prover = prover if prover else TableauProver()
+        return run_steps(self.resume_steps(prover))
+
+
+def _decode(buffer):
+    views = []
+
+    def section_bytes(name, offset, size):
+        if offset % 4 or offset + size > len(buffer):
+            raise SnapshotError(f"Truncated or misplaced section '{name}'")
+        return buffer[offset:offset + size]
+
+    def u32(name, offset, size):
+        if size % 4:
+            raise SnapshotError(f"Section '{name}' is not a table of u32")
+        view = section_bytes(name, offset, size)
+        views.append(view)
+        if sys.byteorder != "little":
+            table = array("I")
+            table.frombytes(view)
+            table.byteswap()
+            return table
+        view = view.cast("I")
+        views.append(view)
+        return view
+
+    try:
+        if len(buffer) < 12 or bytes(buffer[:4]) != MAGIC:
+            raise SnapshotError("Not a tableau snapshot")
+        version, count = struct.unpack_from("<II", buffer, 4)
+        if version != VERSION or count != len(SECTIONS):
+            raise SnapshotError(f"Unsupported snapshot version {version}")
+        if len(buffer) < 12 + 8 * count:
+            raise SnapshotError("Truncated snapshot header")
+        directory = {name: struct.unpack_from("<II", buffer, 12 + 8 * i)
+                     for i, name in enumerate(SECTIONS)}
+        section = {name: u32(name, *entry) for name, entry in directory.items()
+                   if name not in BYTE_SECTIONS}
+        blob = bytes(section_bytes("strings", *directory["strings"]))
+        text = bytes(section_bytes("info", *directory["info"]))
+        # Las tablas pueden tener el largo justo y aun así índices fuera de
+        # rango o registros incompletos: cualquier falla al reconstruir es
+        # un archivo corrupto
+        try:
+            info = json.loads(text.decode("utf-8"))
+            if not isinstance(info, dict):
+                raise ValueError("info is not an object")
+            return _build(section, blob, info)
+        except (struct.error, IndexError, KeyError, TypeError, ValueError) as e:
+            raise SnapshotError(f"Corrupt snapshot: {e}") from e
+    finally:
+        for view in reversed(views):
+            view.release()
+
+
+def _build(section, blob, info):
+    strings = []
+    start = 0
+    for end in section["string_ends"]:
+        strings.append(blob[start:end].decode("utf-8"))
+        start = end
+
+    nodes = []
+    table = section["nodes"]
+    for i in range(0, len(table), 3):
+        kind, a, b = table[i], table[i + 1], table[i + 2]
+        cls = NODE_KINDS[kind]
+        if cls is AtomicTerm:
+            nodes.append(AtomicTerm(strings[a]))
+        elif len(cls._fields) == 1:
+            nodes.append(intern_node(cls(nodes[a])))
+        else:
+            nodes.append(intern_node(cls(nodes[a], nodes[b])))
+
+    deps = []
+    items = section["deps"]
+    start = 0
+    for end in section["deps_ends"][1:]:
+        deps.append(frozenset(items[start:end]))
+        start = end
+
+    relations = []
+    table = section["relations"]
+    for i in range(0, len(table), 4):
+        if table[i] == 0:
+            relations.append(RelationQ(strings[table[i + 1]], strings[table[i + 2]],
+                                       strings[table[i + 3]]))
+        else:
+            relations.append(RelationS(strings[table[i + 1]], strings[table[i + 2]]))
+
+    rules = _rule_classes()
+    formulas, own_relations, applied = section["formulas"], section["branch_relations"], section["applied"]
+    branches = []
+    table = section["branches"]
+    for i in range(0, len(table), BRANCH_FIELDS):
+        parent, closed, closed_by, f0, f1, r0, r1, a0, a1 = table[i:i + BRANCH_FIELDS]
+        branch = Branch(parent=branches[parent - 1] if parent else None)
+        for j in range(f0, f1):
+            lf = branch.add_formula(nodes[formulas[3 * j]], strings[formulas[3 * j + 1]])
+            lf.deps = deps[formulas[3 * j + 2]]
+        for j in range(r0, r1):
+            branch.add_relation(relations[own_relations[j]])
+        for j in range(a0, a1):
+            rule, node, state, relation = applied[4 * j:4 * j + 4]
+            branch.mark_applied((rules[strings[rule]], nodes[node], strings[state],
+                                 relations[relation - 1] if relation else None))
+        branch.closed = bool(closed)
+        branch.closed_by = deps[closed_by - 1] if closed_by else None
+        branches.append(branch)
+
+    root, var_counter, pruned_deps, created, pruned, checks = section["counters"]
+    tableau = Tableau([])
+    tableau.root = branches[root]
+    tableau.branches = [branches[i] for i in section["leaves"]]
+    table = section["initial"]
+    tableau.initial_formulas = [(nodes[table[i]], strings[table[i + 1]]) for i in range(0, len(table), 2)]
+    table = section["state_deps"]
+    tableau.state_deps = {strings[table[i]]: deps[table[i + 1]] for i in range(0, len(table), 2)}
+    table = section["state_parent"]
+    tableau.state_parent = {strings[table[i]]: strings[table[i + 1]] for i in range(0, len(table), 2)}
+    table = section["equivalent"]
+    tableau.equivalent = {strings[table[i]]: strings[table[i + 1]] for i in range(0, len(table), 2)}
+    tableau.pruned_deps = set(deps[pruned_deps])
+    tableau.var_counter = var_counter
+    tableau.branches_created = created
+    tableau.pruned_children = pruned
+    tableau.closure_checks = checks
+    return Snapshot(tableau, info)
+
+
+def loads(data):
+    """Snapshot desde bytes"""
+    return _decode(memoryview(data))
+
+
+def load(path):
+    """Snapshot desde un archivo (mapeado en memoria, sin leerlo entero)"""
+    with open(path, "rb") as source:
+        with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as buffer:
+                return _decode(buffer)
+
+
+# ============================================================================
+# LINEA DE COMANDOS
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspeccionar o continuar instantaneas de tableaux")
+    parser.add_argument("command", choices=("info", "resume"))
+    parser.add_argument("path")
+    parser.add_argument("--max-iterations", type=int, default=1000,
+                        help="Presupuesto adicional para 'resume'")
+    parser.add_argument("--save", help="Con 'resume': guardar el tableau resultante si no se decide")
+    args = parser.parse_args(argv)
+
+    try:
+        snapshot = load(args.path)
+    except (OSError, ValueError, SnapshotError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    tableau = snapshot.tableau
+    print(f"Info: {json.dumps(snapshot.info, ensure_ascii=False)}")
+    print(f"Ramas: {len(tableau.branches)} ({tableau.count_open()} abiertas)  "
+          f"Variables usadas: {tableau.var_counter}")
+    if args.command == "info":
+        return 0
+
+    prover = TableauProver(max_iterations=args.max_iterations)
+    result = snapshot.resume(prover)
+    if prover.exhausted:
+        print("Resultado: sin decidir (se agoto el presupuesto)")
+        if args.save:
+            info = dict(snapshot.info)
+            info["max_iterations"] = info.get("max_iterations", 0) + args.max_iterations
+            save(args.save, prover.tableau, **info)
+            print(f"Guardado en {args.save}")
+        return 3
+    print(f"Resultado: {'valido' if result else 'no valido'}")
+    if result and prover.unsat_core is not None:
+        print(f"Premisas usadas: {', '.join(str(p) for p in prover.unsat_core)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())